@@ -0,0 +1,215 @@
+import argparse
+import random
+import time
+import tracemalloc
+from array import array
+
+from lab1 import TALK, MESSAGE, CONNECTION, EVENT_NAMES, NullSink, Main, BillingEngine
+
+
+DEFAULT_OPERATORS = (
+    (1.5, 0.5, 0.2, 10),
+    (1.2, 0.6, 0.3, 15),
+    (1.0, 0.8, 0.1, 5),
+)
+DEFAULT_AGES = ((10, 17, 0.15), (18, 64, 0.7), (65, 90, 0.15))
+DEFAULT_MIX = (0.6, 0.3, 0.1)
+
+
+def make_main(customers, rng, operators=DEFAULT_OPERATORS, operatorWeights=None, ages=DEFAULT_AGES,
+              limits=(50, 500), ledger=False):
+    # Події йдуть у NullSink, щоб вимірювався лише білінг, а не виведення
+    main = Main(sink=NullSink())
+    for ID, tariff in enumerate(operators):
+        main.create_operator(ID, *tariff)
+    bands = [(low, high) for low, high, _ in ages]
+    bandWeights = [weight for _, _, weight in ages]
+    for ID in range(customers):
+        operator = rng.choices(main.operators, operatorWeights)[0]
+        low, high = rng.choices(bands, bandWeights)[0]
+        limitingAmount = float(rng.randint(*limits))
+        bill = main.open_account(limitingAmount) if ledger else main.create_bill(limitingAmount)
+        main.create_customer(ID, f"Customer {ID}", rng.randint(low, high), operator, bill, limitingAmount)
+    return main
+
+
+def make_events(count, customers, rng, mix=DEFAULT_MIX, minutes=(1, 30), messages=(1, 10), megabytes=(1, 500)):
+    customerIndexes = array('l', (rng.randrange(customers) for _ in range(count)))
+    others = array('l', (rng.randrange(customers) for _ in range(count)))
+    kinds = array('b', rng.choices((TALK, MESSAGE, CONNECTION), mix, k=count))
+    ranges = {TALK: minutes, MESSAGE: messages, CONNECTION: megabytes}
+    quantities = array('d', (rng.randint(*ranges[kind]) for kind in kinds))
+    return customerIndexes, kinds, quantities, others
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def replay(main, events):
+    customers = main.customers
+    for customer, kind, quantity, other in zip(*events):
+        customer = customers[customer]
+        if kind == TALK:
+            customer.talk(quantity, customers[other])
+        elif kind == MESSAGE:
+            customer.message(quantity, customers[other])
+        else:
+            customer.connection(quantity)
+
+
+def bench_customer(main, events):
+    start = time.perf_counter()
+    replay(main, events)
+    return len(events[0]) / (time.perf_counter() - start)
+
+
+def bench_latency(main, events, limit=100000):
+    # Окремий прохід з таймером на кожну подію, щоб вимір затримки не спотворював пропускну здатність
+    customers = main.customers
+    clock = time.perf_counter_ns
+    samples = {kind: [] for kind in (TALK, MESSAGE, CONNECTION)}
+    for customer, kind, quantity, other, _ in zip(*events, range(limit)):
+        customer = customers[customer]
+        if kind == TALK:
+            start = clock()
+            customer.talk(quantity, customers[other])
+        elif kind == MESSAGE:
+            start = clock()
+            customer.message(quantity, customers[other])
+        else:
+            start = clock()
+            customer.connection(quantity)
+        samples[kind].append(clock() - start)
+    result = {}
+    for kind, values in samples.items():
+        values.sort()
+        if values:
+            result[EVENT_NAMES[kind]] = (percentile(values, 0.5), percentile(values, 0.99))
+    return result
+
+
+def bench_operator(main, events):
+    customers = main.customers
+    start = time.perf_counter()
+    for customer, kind, quantity, other in zip(*events):
+        customer = customers[customer]
+        operator = customer.operator
+        if kind == TALK:
+            operator.calculateTalkingCost(quantity, customer)
+        elif kind == MESSAGE:
+            operator.calculateMessageCost(quantity, customer, customers[other])
+        else:
+            operator.calculateNetworkCost(quantity)
+    return len(events[0]) / (time.perf_counter() - start)
+
+
+def bench_bill(main, events):
+    indexes = events[0]
+    amounts = array('d', (quantity * 0.01 for quantity in events[2]))
+    ledger = main.ledger
+    start = time.perf_counter()
+    for index, amount in zip(indexes, amounts):
+        if ledger.check(index, amount):
+            ledger.add(index, amount)
+    scalar = len(indexes) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    ledger.add_many(indexes, amounts)
+    batch = len(indexes) / (time.perf_counter() - start)
+    return scalar, batch
+
+
+def bench_engine(main, events, ledger=None):
+    engine = BillingEngine(main.customers, ledger)
+    start = time.perf_counter()
+    engine.apply_events(*events)
+    return len(events[0]) / (time.perf_counter() - start)
+
+
+def reset(main):
+    for bill in main.bills:
+        bill.currentDebt = 0.0
+    main.ledger.debts[:] = array('d', bytes(8 * len(main.ledger)))
+
+
+def bench_build(customers, seed):
+    start = time.perf_counter()
+    main = make_main(customers, random.Random(seed))
+    return main, customers / (time.perf_counter() - start)
+
+
+def peak_memory(customers, seed):
+    # tracemalloc сповільнює виконання, тому пам'ять вимірюється окремою побудовою
+    tracemalloc.start()
+    make_main(customers, random.Random(seed))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def scales(smallest, largest):
+    result = []
+    scale = smallest
+    while scale <= largest:
+        result.append(scale)
+        scale *= 10
+    return result
+
+
+def run(customerCounts, eventsPerCustomer=10, maxEvents=1000000, latencyEvents=100000, seed=1, memory=True):
+    rows = []
+    for customers in customerCounts:
+        peak = peak_memory(customers, seed) if memory else 0
+        main, built = bench_build(customers, seed)
+        events = make_events(min(customers * eventsPerCustomer, maxEvents), customers, random.Random(seed))
+        # Борги скидаються між проходами, тож кожен вимір стартує з того самого стану
+        row = {
+            "customers": customers,
+            "events": len(events[0]),
+            "build_per_s": built,
+            "peak_mib": peak / (1 << 20),
+            "operator_per_s": bench_operator(main, events),
+            "customer_per_s": bench_customer(main, events),
+        }
+        reset(main)
+        row["latency_ns"] = bench_latency(main, events, latencyEvents)
+        reset(main)
+        row["engine_per_s"] = bench_engine(main, events)
+        # Ті самі клієнти, але з рахунками в реєстрі рахунків, для проходів по його стовпцях
+        main = make_main(customers, random.Random(seed), ledger=True)
+        row["bill_per_s"], row["bill_batch_per_s"] = bench_bill(main, events)
+        reset(main)
+        row["engine_ledger_per_s"] = bench_engine(main, events, main.ledger)
+        rows.append(row)
+    return rows
+
+
+def print_rows(rows):
+    print(f"{'customers':>10} {'events':>9} {'build/s':>10} {'peak MiB':>9} {'operator/s':>11} "
+          f"{'customer/s':>11} {'bill/s':>11} {'bill batch/s':>13} {'engine/s':>11} {'ledger/s':>11}")
+    for row in rows:
+        print(f"{row['customers']:>10} {row['events']:>9} {row['build_per_s']:>10.0f} {row['peak_mib']:>9.1f} "
+              f"{row['operator_per_s']:>11.0f} {row['customer_per_s']:>11.0f} {row['bill_per_s']:>11.0f} "
+              f"{row['bill_batch_per_s']:>13.0f} {row['engine_per_s']:>11.0f} {row['engine_ledger_per_s']:>11.0f}")
+    print("Per-event latency, p50/p99 ns")
+    for row in rows:
+        latency = "  ".join(f"{name} {p50}/{p99}" for name, (p50, p99) in row["latency_ns"].items())
+        print(f"{row['customers']:>10}  {latency}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Billing simulation benchmarks")
+    parser.add_argument("--min-customers", type=int, default=1000)
+    parser.add_argument("--max-customers", type=int, default=100000, help="up to 10000000 for the full curve")
+    parser.add_argument("--events-per-customer", type=int, default=10)
+    parser.add_argument("--max-events", type=int, default=1000000)
+    parser.add_argument("--latency-events", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced build used for peak memory")
+    args = parser.parse_args(argv)
+    print_rows(run(scales(args.min_customers, args.max_customers), args.events_per_customer, args.max_events,
+                   args.latency_events, args.seed, not args.no_memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,211 @@
+import csv
+import json
+import os
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+
+TALK, MESSAGE, CONNECTION = 0, 1, 2
+EVENT_NAMES = ("talk", "message", "connection")
+
+
+class NullSink:
+    def emit(self, event, customer, quantity, other, accepted):
+        pass
+
+    def flush(self):
+        pass
+
+
+class StdoutSink(NullSink):
+    def emit(self, event, customer, quantity, other, accepted):
+        if event == TALK:
+            if accepted:
+                print(f'{customer.name} talked to {other.name} for {quantity} minutes.')
+            else:
+                print(f'{customer.name} cannot talk due to bill limit.')
+        elif event == MESSAGE:
+            if accepted:
+                print(f'{customer.name} sent {quantity} messages to {other.name}.')
+            else:
+                print(f'{customer.name} cannot send messages due to bill limit.')
+        elif accepted:
+            print(f'{customer.name} connected to the internet using {quantity} MB.')
+        else:
+            print(f'{customer.name} cannot connect due to bill limit.')
+
+
+class RingBufferSink(NullSink):
+    def __init__(self, capacity=10000):
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, event, customer, quantity, other, accepted):
+        self.events.append((event, customer.ID, quantity, None if other is None else other.ID, accepted))
+
+
+class JsonLinesSink(NullSink):
+    def __init__(self, path, flushSize=1000):
+        self.file = open(path, "a")
+        self.flushSize = flushSize
+        self.buffer = []
+
+    def emit(self, event, customer, quantity, other, accepted):
+        self.buffer.append(json.dumps({
+            "event": EVENT_NAMES[event],
+            "customerID": customer.ID,
+            "quantity": quantity,
+            "otherID": None if other is None else other.ID,
+            "accepted": accepted
+        }))
+        if len(self.buffer) >= self.flushSize:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+DEFAULT_SINK = StdoutSink()
+
+
 class Customer:
-    def __init__(self, ID, name, age, operator, bill, limitingAmount):
+    def __init__(self, ID, name, age, operator, bill, limitingAmount, sink=None):
         self.ID = ID
         self.name = name
         self.age = age
         self.operator = operator
         self.bill = bill
         self.limitingAmount = limitingAmount
+        self.sink = sink if sink is not None else DEFAULT_SINK
+        self.registry = None
 
     def talk(self, minute, other):
         cost = self.operator.calculateTalkingCost(minute, self)
-        if self.bill.check(cost):
+        accepted = self.bill.check(cost)
+        if accepted:
             self.bill.add(cost)
-            print(f'{self.name} talked to {other.name} for {minute} minutes.')
-        else:
-            print(f'{self.name} cannot talk due to bill limit.')
+        self.sink.emit(TALK, self, minute, other, accepted)
 
     def message(self, quantity, other):
         cost = self.operator.calculateMessageCost(quantity, self, other)
-        if self.bill.check(cost):
+        accepted = self.bill.check(cost)
+        if accepted:
             self.bill.add(cost)
-            print(f'{self.name} sent {quantity} messages to {other.name}.')
-        else:
-            print(f'{self.name} cannot send messages due to bill limit.')
+        self.sink.emit(MESSAGE, self, quantity, other, accepted)
 
     def connection(self, amount):
         cost = self.operator.calculateNetworkCost(amount)
-        if self.bill.check(cost):
+        accepted = self.bill.check(cost)
+        if accepted:
             self.bill.add(cost)
-            print(f'{self.name} connected to the internet using {amount} MB.')
-        else:
-            print(f'{self.name} cannot connect due to bill limit.')
+        self.sink.emit(CONNECTION, self, amount, None, accepted)
 
     def getAge(self):
         return self.age
 
     def setAge(self, age):
-        self.age = age
+        # Через реєстр, щоб індекс за віковими групами лишався актуальним
+        if self.registry is not None:
+            self.registry.update_age(self, age)
+        else:
+            self.age = age
+
+
+class TariffRate:
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.name)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.name, value)
+        if hasattr(instance, "_costCache"):
+            instance.compileTariffs()
 
 
 class Operator:
-    def __init__(self, ID, talkingCharge, messageCost, networkCharge, discountRate):
+    talkingCharge = TariffRate()
+    messageCost = TariffRate()
+    networkCharge = TariffRate()
+    discountRate = TariffRate()
+
+    def __init__(self, ID, talkingCharge, messageCost, networkCharge, discountRate, cacheSize=0):
         self.ID = ID
         self.talkingCharge = talkingCharge
         self.messageCost = messageCost
         self.networkCharge = networkCharge
         self.discountRate = discountRate
+        self.cacheSize = cacheSize
+        self._costCache = OrderedDict()
+        self.compileTariffs()
 
-    def calculateTalkingCost(self, minute, customer):
-        cost = minute * self.talkingCharge
-        if customer.age < 18 or customer.age > 65:
-            cost *= (1 - self.discountRate / 100)
+    def compileTariffs(self):
+        # Множники за віковою групою та для дзвінків/повідомлень всередині мережі
+        self.discountMultiplier = 1 - self.discountRate / 100
+        self.talkingTable = {"young": self.discountMultiplier, "adult": 1.0, "senior": self.discountMultiplier}
+        self.messageTable = (1.0, self.discountMultiplier)
+        self._costCache.clear()
+
+    def cost(self, kind, quantity, band=None):
+        # band - вікова група для дзвінка або ознака повідомлення всередині мережі
+        if kind == TALK:
+            if band not in self.talkingTable:
+                raise ValueError(f"Talk cost requires an age band, got {band!r}")
+            return quantity * self._talkingCharge * self.talkingTable[band]
+        if kind == MESSAGE:
+            if band is None:
+                raise ValueError("Message cost requires the on-net flag")
+            return quantity * self._messageCost * self.messageTable[band]
+        return quantity * self._networkCharge
+
+    def cachedCost(self, kind, quantity, band=None):
+        key = (kind, quantity, band)
+        cache = self._costCache
+        cost = cache.get(key)
+        if cost is None:
+            cost = cache[key] = self.cost(kind, quantity, band)
+            if len(cache) > self.cacheSize:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
         return cost
 
+    def calculateTalkingCost(self, minute, customer):
+        if self.cacheSize:
+            return self.cachedCost(TALK, minute, age_band(customer.age))
+        return minute * self._talkingCharge * self.talkingTable[age_band(customer.age)]
+
     def calculateMessageCost(self, quantity, customer, other):
-        cost = quantity * self.messageCost
-        if customer.operator.ID == other.operator.ID:
-            cost *= (1 - self.discountRate / 100)
-        return cost
+        onNet = customer.operator.ID == other.operator.ID
+        if self.cacheSize:
+            return self.cachedCost(MESSAGE, quantity, onNet)
+        return quantity * self._messageCost * self.messageTable[onNet]
 
     def calculateNetworkCost(self, amount):
-        return amount * self.networkCharge
+        if self.cacheSize:
+            return self.cachedCost(CONNECTION, amount)
+        return amount * self._networkCharge
 
 class Bill:
+    __slots__ = ("limitingAmount", "currentDebt")
+
     def __init__(self, limitingAmount):
         self.limitingAmount = limitingAmount
         self.currentDebt = 0.0
@@ -83,36 +227,386 @@ class Bill:
 
     def getLimitingAmount(self):
         return self.limitingAmount
-        
-class Main:
+
+
+class LedgerBill:
+    # Рахунок клієнта в реєстрі рахунків: інтерфейс Bill поверх стовпців за індексом
+    __slots__ = ("ledger", "index")
+
+    def __init__(self, ledger, index):
+        self.ledger = ledger
+        self.index = index
+
+    @property
+    def limitingAmount(self):
+        return self.ledger.limits[self.index]
+
+    @limitingAmount.setter
+    def limitingAmount(self, amount):
+        self.ledger.limits[self.index] = amount
+
+    @property
+    def currentDebt(self):
+        return self.ledger.debts[self.index]
+
+    @currentDebt.setter
+    def currentDebt(self, amount):
+        self.ledger.debts[self.index] = amount
+
+    def check(self, amount):
+        return self.ledger.check(self.index, amount)
+
+    def add(self, amount):
+        self.ledger.add(self.index, amount)
+
+    def pay(self, amount):
+        self.ledger.pay(self.index, amount)
+
+    def changeTheLimit(self, amount):
+        self.ledger.changeTheLimit(self.index, amount)
+
+    def getCurrentDebt(self):
+        return self.ledger.debts[self.index]
+
+    def getLimitingAmount(self):
+        return self.ledger.limits[self.index]
+
+
+class BillLedger:
+    def __init__(self):
+        self.limits = array('d')
+        self.debts = array('d')
+        self.period = 0
+        self.history = []
+
+    def __len__(self):
+        return len(self.debts)
+
+    def open(self, limitingAmount):
+        self.limits.append(limitingAmount)
+        self.debts.append(0.0)
+        return len(self.debts) - 1
+
+    def bill(self, index):
+        return LedgerBill(self, index)
+
+    def check(self, index, amount):
+        return (self.debts[index] + amount) <= self.limits[index]
+
+    def add(self, index, amount):
+        self.debts[index] += amount
+
+    def pay(self, index, amount):
+        self.debts[index] -= amount
+
+    def changeTheLimit(self, index, amount):
+        self.limits[index] = amount
+
+    def check_many(self, indexes, amounts):
+        debts, limits = self.debts, self.limits
+        return array('b', [(debts[i] + amount) <= limits[i] for i, amount in zip(indexes, amounts)])
+
+    def add_many(self, indexes, amounts):
+        debts = self.debts
+        for i, amount in zip(indexes, amounts):
+            debts[i] += amount
+
+    def pay_many(self, indexes, amounts):
+        debts = self.debts
+        for i, amount in zip(indexes, amounts):
+            debts[i] -= amount
+
+    def change_limits(self, indexes, amounts):
+        limits = self.limits
+        for i, amount in zip(indexes, amounts):
+            limits[i] = amount
+
+    def snapshot(self):
+        return array('d', self.debts), array('d', self.limits)
+
+    def rollover(self):
+        # Закриття розрахункового періоду: борги переносяться, знімок іде в історію
+        debts, limits = self.snapshot()
+        self.history.append((self.period, debts, limits))
+        self.period += 1
+        return self.period
+
+
+def age_band(age):
+    if age < 18:
+        return "young"
+    if age > 65:
+        return "senior"
+    return "adult"
+
+
+class Registry:
     def __init__(self):
+        self.customers = {}
+        self.operators = {}
+        self.customersByOperator = {}
+        self.customersByAgeBand = {"young": {}, "adult": {}, "senior": {}}
+
+    def add_operator(self, operator):
+        self.operators[operator.ID] = operator
+        self.customersByOperator.setdefault(operator.ID, {})
+
+    def add_customer(self, customer):
+        if customer.ID in self.customers:
+            self.remove_customer(customer.ID)
+        self.customers[customer.ID] = customer
+        customer.registry = self
+        self.customersByOperator.setdefault(customer.operator.ID, {})[customer.ID] = customer
+        self.customersByAgeBand[age_band(customer.age)][customer.ID] = customer
+
+    def remove_customer(self, ID):
+        customer = self.customers.pop(ID, None)
+        if customer is not None:
+            customer.registry = None
+            del self.customersByOperator[customer.operator.ID][ID]
+            del self.customersByAgeBand[age_band(customer.age)][ID]
+        return customer
+
+    def update_age(self, customer, age):
+        del self.customersByAgeBand[age_band(customer.age)][customer.ID]
+        customer.age = age
+        self.customersByAgeBand[age_band(age)][customer.ID] = customer
+
+    def get_customer(self, ID):
+        return self.customers.get(ID)
+
+    def get_operator(self, ID):
+        return self.operators.get(ID)
+
+    def customers_of(self, operatorID):
+        return list(self.customersByOperator.get(operatorID, {}).values())
+
+    def customers_in_band(self, band):
+        return list(self.customersByAgeBand[band].values())
+
+
+def _read_records(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as file:
+            yield from csv.DictReader(file)
+    elif path.endswith(".json"):
+        with open(path) as file:
+            yield from json.load(file)
+    else:
+        raise ValueError(f"Unsupported roster format: {path}")
+
+
+class BillingEngine:
+    # Без NumPy векторні обчислення з масками по операторах замінено одним циклом по подіях з вбудованими формулами
+    def __init__(self, customers, ledger=None):
+        # З реєстром рахунків кожен клієнт має рахунок з ledger.bill(), і рушій бере його індекс
+        self.customers = list(customers)
+        self.ledger = ledger
+        self.refresh()
+
+    def refresh(self):
+        # Стовпці тарифів по клієнтах; викликати після зміни віку, оператора чи тарифів
+        self.talkingCharge = array('d')
+        self.talkingFactor = array('d')
+        self.messageCost = array('d')
+        self.messageFactor = array('d')
+        self.networkCharge = array('d')
+        self.operatorIDs = []
+        self.billSlots = array('l')
+        self.bills = []
+        slots = {}
+        for customer in self.customers:
+            operator = customer.operator
+            self.talkingCharge.append(operator.talkingCharge)
+            self.talkingFactor.append(operator.talkingTable[age_band(customer.age)])
+            self.messageCost.append(operator.messageCost)
+            self.messageFactor.append(operator.discountMultiplier)
+            self.networkCharge.append(operator.networkCharge)
+            self.operatorIDs.append(operator.ID)
+            if self.ledger is None:
+                slot = slots.get(id(customer.bill))
+                if slot is None:
+                    slot = slots[id(customer.bill)] = len(self.bills)
+                    self.bills.append(customer.bill)
+                self.billSlots.append(slot)
+            else:
+                bill = customer.bill
+                if not isinstance(bill, LedgerBill) or bill.ledger is not self.ledger:
+                    raise ValueError(f"Customer {customer.ID} has no account in this ledger")
+                self.billSlots.append(bill.index)
+
+    def apply_events(self, customerIndexes, kinds, quantities, others=None):
+        # Вхідні дані можуть бути ітераторами, тож перевірка йде в самому циклі, а не окремим проходом
+        if others is None:
+            others = repeat(None)
+        talkingCharge, talkingFactor = self.talkingCharge, self.talkingFactor
+        messageCost, messageFactor = self.messageCost, self.messageFactor
+        networkCharge, operatorIDs, billSlots = self.networkCharge, self.operatorIDs, self.billSlots
+        if self.ledger is not None:
+            debts, limits = self.ledger.debts, self.ledger.limits
+        else:
+            debts = array('d', [bill.currentDebt for bill in self.bills])
+            limits = array('d', [bill.limitingAmount for bill in self.bills])
+        accepted = array('b')
+        for customer, kind, quantity, other in zip(customerIndexes, kinds, quantities, others):
+            if kind == TALK:
+                cost = quantity * talkingCharge[customer] * talkingFactor[customer]
+            elif kind == MESSAGE:
+                if other is None:
+                    raise ValueError("Message events require the other customer index")
+                cost = quantity * messageCost[customer]
+                if operatorIDs[customer] == operatorIDs[other]:
+                    cost *= messageFactor[customer]
+            elif kind == CONNECTION:
+                cost = quantity * networkCharge[customer]
+            else:
+                raise ValueError(f"Unknown event kind: {kind}")
+            slot = billSlots[customer]
+            debt = debts[slot] + cost
+            if debt <= limits[slot]:
+                debts[slot] = debt
+                accepted.append(1)
+            else:
+                accepted.append(0)
+        for bill, debt in zip(self.bills, debts):
+            bill.currentDebt = debt
+        return accepted
+
+
+def _run_shard(operators, customers, operatorOf, events):
+    operators = {record[0]: Operator(*record) for record in operators}
+    shardCustomers = []
+    bills = {}
+    for ID, age, operatorID, billKey, limitingAmount, currentDebt in customers:
+        bill = bills.get(billKey)
+        if bill is None:
+            bill = bills[billKey] = Bill(limitingAmount)
+            bill.currentDebt = currentDebt
+        shardCustomers.append(Customer(ID, None, age, operators[operatorID], bill, limitingAmount, NullSink()))
+    index = {customer.ID: i for i, customer in enumerate(shardCustomers)}
+    for ID, operatorID in operatorOf.items():
+        if ID not in index:
+            index[ID] = len(shardCustomers)
+            shardCustomers.append(Customer(ID, None, 0, operators[operatorID], Bill(0), 0, NullSink()))
+    engine = BillingEngine(shardCustomers)
+    accepted = engine.apply_events([index[event[1]] for event in events], [event[2] for event in events],
+                                   [event[3] for event in events],
+                                   [index[event[4]] if event[4] is not None else None for event in events])
+    debts = [(customer.ID, customer.bill.currentDebt) for customer in shardCustomers[:len(customers)]]
+    return [event[0] for event in events], accepted, debts
+
+
+class ShardedRunner:
+    # Клієнти розподіляються за ID власника рахунку, тож клієнти зі спільним рахунком опиняються в одному шарді
+    def __init__(self, main, shards=None):
+        self.main = main
+        self.shards = shards or os.cpu_count() or 1
+
+    def shard_of(self, customerID):
+        return hash(customerID) % self.shards
+
+    def run(self, events):
+        registry = self.main.registry
+        billOwners = {}
+        for customer in registry.customers.values():
+            billOwners.setdefault(id(customer.bill), customer.ID)
+        shardEvents = [[] for _ in range(self.shards)]
+        count = 0
+        for position, (customerID, kind, quantity, otherID) in enumerate(events):
+            customer = registry.get_customer(customerID)
+            if customer is None:
+                raise ValueError(f"Unknown customer {customerID} in event {position}")
+            if kind not in (TALK, MESSAGE, CONNECTION):
+                raise ValueError(f"Unknown event kind {kind} in event {position}")
+            if kind == MESSAGE and otherID is None:
+                raise ValueError(f"Message event {position} requires the other customer ID")
+            if otherID is not None and registry.get_customer(otherID) is None:
+                raise ValueError(f"Unknown customer {otherID} in event {position}")
+            owner = billOwners[id(customer.bill)]
+            shardEvents[self.shard_of(owner)].append((position, customerID, kind, quantity, otherID))
+            count = position + 1
+        operators = [(o.ID, o.talkingCharge, o.messageCost, o.networkCharge, o.discountRate)
+                     for o in registry.operators.values()]
+        accepted = array('b', bytes(count))
+        with ProcessPoolExecutor(max_workers=self.shards) as pool:
+            futures = [pool.submit(_run_shard, operators, *self._partition(shard, billOwners))
+                       for shard in shardEvents if shard]
+            for future in futures:
+                positions, shardAccepted, debts = future.result()
+                for position, flag in zip(positions, shardAccepted):
+                    accepted[position] = flag
+                for ID, debt in debts:
+                    registry.get_customer(ID).bill.currentDebt = debt
+        return accepted
+
+    def _partition(self, events, billOwners):
+        registry = self.main.registry
+        customers = {}
+        operatorOf = {}
+        for _, customerID, _, _, otherID in events:
+            if customerID not in customers:
+                customer = registry.get_customer(customerID)
+                customers[customerID] = (customer.ID, customer.age, customer.operator.ID, billOwners[id(customer.bill)],
+                                         customer.bill.limitingAmount, customer.bill.currentDebt)
+            if otherID is not None and otherID not in operatorOf:
+                operatorOf[otherID] = registry.get_customer(otherID).operator.ID
+        return list(customers.values()), operatorOf, events
+
+
+class Main:
+    def __init__(self, sink=None):
+        self.sink = sink
         self.customers = []
         self.operators = []
         self.bills = []
+        self.ledger = BillLedger()
+        self.registry = Registry()
 
     def create_customer(self, ID, name, age, operator, bill, limitingAmount):
-        customer = Customer(ID, name, age, operator, bill, limitingAmount)
-        self.customers.append(customer)
+        previous = self.registry.get_customer(ID)
+        customer = Customer(ID, name, age, operator, bill, limitingAmount, self.sink)
+        # Повторне створення з тим самим ID замінює клієнта і в списку, і в реєстрі
+        if previous is None:
+            self.customers.append(customer)
+        else:
+            self.customers[self.customers.index(previous)] = customer
+        self.registry.add_customer(customer)
+        return customer
 
     def create_operator(self, ID, talkingCharge, messageCost, networkCharge, discountRate):
         operator = Operator(ID, talkingCharge, messageCost, networkCharge, discountRate)
         self.operators.append(operator)
+        self.registry.add_operator(operator)
+        return operator
 
     def create_bill(self, limitingAmount):
         bill = Bill(limitingAmount)
         self.bills.append(bill)
+        return bill
+
+    def open_account(self, limitingAmount):
+        # Як create_bill, але рахунок живе в реєстрі рахунків, тож BillingEngine може працювати з ним на місці
+        return self.ledger.bill(self.ledger.open(limitingAmount))
 
     def find_customer(self, ID):
-        for customer in self.customers:
-            if customer.ID == ID:
-                return customer
-        return None
+        return self.registry.get_customer(ID)
 
     def find_operator(self, ID):
-        for operator in self.operators:
-            if operator.ID == ID:
-                return operator
-        return None
+        return self.registry.get_operator(ID)
+
+    def load_operators(self, path):
+        for record in _read_records(path):
+            self.create_operator(int(record["ID"]), float(record["talkingCharge"]), float(record["messageCost"]),
+                                 float(record["networkCharge"]), float(record["discountRate"]))
+
+    def load_customers(self, path):
+        for record in _read_records(path):
+            operator = self.find_operator(int(record["operatorID"]))
+            if operator is None:
+                raise ValueError(f"Unknown operator {record['operatorID']} for customer {record['ID']}")
+            limitingAmount = float(record["limitingAmount"])
+            self.create_customer(int(record["ID"]), record["name"], int(record["age"]), operator,
+                                 self.create_bill(limitingAmount), limitingAmount)
 
     def run(self):
         print("Communication System Simulation")
@@ -120,8 +614,8 @@ class Main:
         self.create_operator(0, 1.5, 0.5, 0.2, 10)
         self.create_operator(1, 1.2, 0.6, 0.3, 15)
 
-        bill1 = Bill(100)
-        bill2 = Bill(150)
+        bill1 = self.create_bill(100)
+        bill2 = self.create_bill(150)
 
         self.create_customer(0, "Alice", 20, self.operators[0], bill1, 100)
         self.create_customer(1, "Bob", 16, self.operators[1], bill2, 150)
@@ -0,0 +1,266 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from lab1 import (TALK, MESSAGE, CONNECTION, NullSink, StdoutSink, RingBufferSink, JsonLinesSink, Operator,
+                  Main, BillingEngine, ShardedRunner)
+
+
+def make_main(seed, customers=40, sink=None, ledger=False):
+    rng = random.Random(seed)
+    main = Main(sink=sink or NullSink())
+    main.create_operator(0, 1.5, 0.5, 0.2, 10)
+    main.create_operator(1, 1.2, 0.6, 0.3, 15)
+    main.create_operator(2, 1.0, 0.8, 0.1, 5)
+    for ID in range(customers):
+        limitingAmount = float(rng.randint(20, 200))
+        bill = main.open_account(limitingAmount) if ledger else main.create_bill(limitingAmount)
+        main.create_customer(ID, f"Customer {ID}", rng.randint(10, 90), rng.choice(main.operators), bill,
+                             limitingAmount)
+    return main
+
+
+def make_events(seed, count=2000, customers=40):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        kind = rng.choice((TALK, MESSAGE, CONNECTION))
+        other = rng.randrange(customers) if kind != CONNECTION else None
+        events.append((rng.randrange(customers), kind, rng.randint(1, 20), other))
+    return events
+
+
+def replay(main, events):
+    sink = RingBufferSink(len(events))
+    for customer in main.customers:
+        customer.sink = sink
+    for customerID, kind, quantity, otherID in events:
+        customer = main.find_customer(customerID)
+        if kind == TALK:
+            customer.talk(quantity, main.find_customer(otherID))
+        elif kind == MESSAGE:
+            customer.message(quantity, main.find_customer(otherID))
+        else:
+            customer.connection(quantity)
+    return [int(event[4]) for event in sink.events]
+
+
+def debts(main):
+    return [customer.bill.getCurrentDebt() for customer in main.customers]
+
+
+class TestBillingEngine(unittest.TestCase):
+
+    def test_matches_scalar_path(self):
+        events = make_events(1)
+        scalar = make_main(1)
+        expected = replay(scalar, events)
+
+        batch = make_main(1)
+        engine = BillingEngine(batch.customers)
+        accepted = engine.apply_events([event[0] for event in events], [event[1] for event in events],
+                                       [event[2] for event in events], [event[3] for event in events])
+        self.assertEqual(list(accepted), expected)
+        self.assertEqual(debts(batch), debts(scalar))
+
+    def test_ledger_accounts_match_scalar_path(self):
+        events = make_events(6)
+        scalar = make_main(6)
+        expected = replay(scalar, events)
+
+        batch = make_main(6, ledger=True)
+        engine = BillingEngine(batch.customers, ledger=batch.ledger)
+        accepted = engine.apply_events([event[0] for event in events], [event[1] for event in events],
+                                       [event[2] for event in events], [event[3] for event in events])
+        self.assertEqual(list(accepted), expected)
+        self.assertEqual(list(batch.ledger.debts), debts(scalar))
+        self.assertEqual(debts(batch), debts(scalar))
+        self.assertEqual(batch.bills, [])
+
+        ledgerScalar = make_main(6, ledger=True)
+        self.assertEqual(replay(ledgerScalar, events), expected)
+        self.assertEqual(list(ledgerScalar.ledger.debts), debts(scalar))
+
+        batch.ledger.rollover()
+        period, history, _ = batch.ledger.history[0]
+        self.assertEqual((period, list(history)), (0, debts(scalar)))
+
+    def test_ledger_requires_accounts(self):
+        main = make_main(6)
+        with self.assertRaises(ValueError):
+            BillingEngine(main.customers, ledger=main.ledger)
+
+    def test_message_requires_other(self):
+        engine = BillingEngine(make_main(1).customers)
+        with self.assertRaises(ValueError):
+            engine.apply_events([0], [MESSAGE], [1])
+
+    def test_accepts_iterators(self):
+        events = [event for event in make_events(1) if event[1] != MESSAGE]
+        scalar = make_main(1)
+        expected = replay(scalar, events)
+
+        batch = make_main(1)
+        engine = BillingEngine(batch.customers)
+        accepted = engine.apply_events((event[0] for event in events), (event[1] for event in events),
+                                       (event[2] for event in events))
+        self.assertEqual(list(accepted), expected)
+        self.assertEqual(debts(batch), debts(scalar))
+
+
+class TestShardedRunner(unittest.TestCase):
+
+    def test_matches_sequential_replay(self):
+        events = make_events(2)
+        sequential = make_main(2)
+        expected = replay(sequential, events)
+
+        sharded = make_main(2)
+        accepted = ShardedRunner(sharded, shards=3).run(events)
+        self.assertEqual(list(accepted), expected)
+        self.assertEqual(debts(sharded), debts(sequential))
+
+
+    def test_shared_bill_stays_in_one_shard(self):
+        main = Main(sink=NullSink())
+        operator = main.create_operator(0, 1.0, 1.0, 1.0, 0)
+        bill = main.create_bill(10)
+        for ID in range(4):
+            main.create_customer(ID, f"Customer {ID}", 30, operator, bill if ID in (1, 2) else main.create_bill(10), 10)
+        accepted = ShardedRunner(main, shards=4).run([(1, CONNECTION, 6, None), (2, CONNECTION, 6, None)])
+        self.assertEqual(list(accepted), [1, 0])
+        self.assertEqual(bill.getCurrentDebt(), 6)
+
+    def test_rejects_invalid_events(self):
+        main = make_main(2, customers=3)
+        runner = ShardedRunner(main, shards=2)
+        for event in ((0, MESSAGE, 1, None), (7, TALK, 1, 0), (0, TALK, 1, 7), (0, 9, 1, None)):
+            with self.assertRaises(ValueError):
+                runner.run([event])
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_load_csv_and_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            operators = os.path.join(directory, "operators.csv")
+            with open(operators, "w", newline="") as file:
+                file.write("ID,talkingCharge,messageCost,networkCharge,discountRate\n0,1.5,0.5,0.2,10\n1,1.2,0.6,0.3,15\n")
+            customers = os.path.join(directory, "customers.json")
+            with open(customers, "w") as file:
+                json.dump([{"ID": 7, "name": "Alice", "age": 20, "operatorID": 0, "limitingAmount": 100},
+                           {"ID": 8, "name": "Bob", "age": 16, "operatorID": 1, "limitingAmount": 150}], file)
+
+            main = Main(sink=NullSink())
+            main.load_operators(operators)
+            main.load_customers(customers)
+
+        self.assertEqual(main.find_operator(1).talkingCharge, 1.2)
+        self.assertEqual(main.find_customer(8).name, "Bob")
+        self.assertEqual(main.find_customer(7).bill.getLimitingAmount(), 100.0)
+        self.assertEqual([customer.ID for customer in main.registry.customers_of(0)], [7])
+        self.assertEqual([customer.ID for customer in main.registry.customers_in_band("young")], [8])
+        self.assertIsNone(main.find_customer(9))
+
+    def test_rejects_bad_rosters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            customers = os.path.join(directory, "customers.json")
+            with open(customers, "w") as file:
+                json.dump([{"ID": 1, "name": "Eve", "age": 30, "operatorID": 5, "limitingAmount": 10}], file)
+            with self.assertRaises(ValueError):
+                Main(sink=NullSink()).load_customers(customers)
+            with self.assertRaises(ValueError):
+                Main(sink=NullSink()).load_customers(os.path.join(directory, "customers.xml"))
+
+
+    def test_age_and_recreate_keep_indexes(self):
+        main = make_main(5, customers=3)
+        customer = main.find_customer(1)
+        customer.setAge(70)
+        self.assertIn(customer, main.registry.customers_in_band("senior"))
+        self.assertEqual(sum(customer in main.registry.customers_in_band(band)
+                             for band in ("young", "adult", "senior")), 1)
+
+        replacement = main.create_customer(1, "Again", 30, main.operators[0], main.create_bill(10), 10)
+        self.assertEqual(len(main.customers), 3)
+        self.assertIs(main.customers[1], replacement)
+        self.assertIs(main.find_customer(1), replacement)
+        self.assertNotIn(customer, main.registry.customers_in_band("senior"))
+        customer.setAge(10)
+        self.assertNotIn(customer, main.registry.customers_in_band("young"))
+
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.main = make_main(3, customers=2)
+        self.first, self.second = self.main.customers
+
+    def test_stdout_sink_keeps_messages(self):
+        self.first.sink = StdoutSink()
+        self.first.bill.changeTheLimit(1000)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.first.talk(10, self.second)
+            self.first.connection(10 ** 6)
+        self.assertEqual(output.getvalue().splitlines(), [
+            "Customer 0 talked to Customer 1 for 10 minutes.",
+            "Customer 0 cannot connect due to bill limit."
+        ])
+
+    def test_ring_buffer_keeps_latest(self):
+        sink = RingBufferSink(capacity=2)
+        self.first.sink = sink
+        self.first.talk(1, self.second)
+        self.first.message(1, self.second)
+        self.first.connection(1)
+        self.assertEqual([event[:4] for event in sink.events], [(MESSAGE, 0, 1, 1), (CONNECTION, 0, 1, None)])
+
+    def test_json_lines_sink_buffers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+            with JsonLinesSink(path, flushSize=2) as sink:
+                self.first.sink = sink
+                self.first.connection(1)
+                self.assertEqual(os.path.getsize(path), 0)
+                self.first.message(2, self.second)
+                self.first.talk(3, self.second)
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+        self.assertEqual([record["event"] for record in records], ["connection", "message", "talk"])
+        self.assertEqual(records[1]["otherID"], 1)
+
+
+class TestTariffs(unittest.TestCase):
+
+    def test_rate_change_recompiles(self):
+        main = make_main(4, customers=2)
+        young = main.customers[0]
+        young.setAge(16)
+        for cacheSize in (0, 8):
+            operator = Operator(9, 2.0, 1.0, 0.5, 10, cacheSize=cacheSize)
+            self.assertAlmostEqual(operator.calculateTalkingCost(10, young), 18.0)
+            operator.discountRate = 50
+            self.assertAlmostEqual(operator.calculateTalkingCost(10, young), 10.0)
+            operator.talkingCharge = 3.0
+            self.assertAlmostEqual(operator.calculateTalkingCost(10, young), 15.0)
+            operator.networkCharge = 1.0
+            self.assertAlmostEqual(operator.calculateNetworkCost(4), 4.0)
+
+    def test_cost_requires_band(self):
+        for cacheSize in (0, 8):
+            operator = Operator(9, 2.0, 1.0, 0.5, 10, cacheSize=cacheSize)
+            with self.assertRaises(ValueError):
+                operator.cost(TALK, 10)
+            with self.assertRaises(ValueError):
+                operator.cachedCost(MESSAGE, 10)
+            self.assertAlmostEqual(operator.cost(TALK, 10, "young"), 18.0)
+            self.assertAlmostEqual(operator.cost(MESSAGE, 10, True), 9.0)
+            self.assertAlmostEqual(operator.cost(CONNECTION, 4), 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,14 @@
 import math
 import json
+import time
+from collections import OrderedDict
 from abc import ABC, abstractmethod
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # === Інтерфейси ===
 class IPort(ABC):
     @abstractmethod
@@ -59,24 +66,44 @@ class LiquidContainer(HeavyContainer):
     def consumption(self):
         return 4.0 * self.weight
 
+_containerKinds = {}
+
+def containerKinds(cls):
+    # Тип контейнера та всі його батьківські типи, щоб лічильники відповідали isinstance
+    kinds = _containerKinds.get(cls)
+    if kinds is None:
+        kinds = _containerKinds[cls] = tuple(c for c in cls.__mro__ if issubclass(c, Container))
+    return kinds
+
 # === Клас Порт ===
 class Port(IPort):
-    def __init__(self, ID, latitude, longitude):
+    def __init__(self, ID, latitude, longitude, historyLimit=None, historyWindow=None, clock=time.monotonic):
         self.ID = ID
         self.latitude = latitude
         self.longitude = longitude
         self.containers = []
-        self.history = []
-        self.current = []
+        self.historyLimit = historyLimit
+        self.historyWindow = historyWindow
+        self.clock = clock
+        self.history = OrderedDict()
+        self.current = {}
 
     def incomingShip(self, ship):
-        if ship not in self.current:
-            self.current.append(ship)
+        self.current.setdefault(ship)
     
     def outgoingShip(self, ship):
-        if ship not in self.history:
-            self.history.append(ship)
-        self.current.remove(ship)
+        if self.historyWindow is not None:
+            # Історія впорядкована за останнім відплиттям, застарілі записи на початку
+            now = self.clock()
+            self.history[ship] = now
+            self.history.move_to_end(ship)
+            while next(iter(self.history.values())) < now - self.historyWindow:
+                self.history.popitem(last=False)
+        elif ship not in self.history:
+            self.history[ship] = None
+            if self.historyLimit is not None and len(self.history) > self.historyLimit:
+                self.history.popitem(last=False)
+        del self.current[ship]
 
     def getDistance(self, other):
         # Розрахунок геопросторової відстані між портами
@@ -84,6 +111,12 @@ class Port(IPort):
 
 # === Клас Корабель ===
 class Ship(IShip):
+    typeLimits = {
+        HeavyContainer: "maxHeavyContainers",
+        RefrigeratedContainer: "maxRefrigeratedContainers",
+        LiquidContainer: "maxLiquidContainers"
+    }
+
     def __init__(self, ID, fuel, currentPort, totalWeightCapacity, maxAllContainers, maxHeavyContainers, maxRefrigeratedContainers, maxLiquidContainers, fuelConsumptionPerKM):
         self.ID = ID
         self.fuel = fuel
@@ -95,10 +128,20 @@ class Ship(IShip):
         self.maxLiquidContainers = maxLiquidContainers
         self.fuelConsumptionPerKM = fuelConsumptionPerKM
         self.containers = []
+        self.containerIndex = {}
+        self.duplicateIDs = {}
+        self.totalWeight = 0
+        self.totalConsumption = 0
+        self.typeCounts = {}
+
+    def tripConsumption(self, port):
+        return self.fuelConsumptionPerKM * self.currentPort.getDistance(port) + self.totalConsumption
+
+    def canReach(self, port):
+        return self.fuel >= self.tripConsumption(port)
 
     def sailTo(self, port):
-        distance = self.currentPort.getDistance(port)
-        totalConsumption = self.fuelConsumptionPerKM * distance + sum([c.consumption() for c in self.containers])
+        totalConsumption = self.tripConsumption(port)
         if self.fuel >= totalConsumption:
             self.fuel -= totalConsumption
             self.currentPort.outgoingShip(self)
@@ -110,86 +153,445 @@ class Ship(IShip):
     def reFuel(self, amount):
         self.fuel += amount
 
+    def canLoad(self, container):
+        if len(self.containers) >= self.maxAllContainers:
+            return False
+        if self.totalWeight + container.weight > self.totalWeightCapacity:
+            return False
+        for kind in containerKinds(type(container)):
+            limit = self.typeLimits.get(kind)
+            if limit is not None and self.typeCounts.get(kind, 0) >= getattr(self, limit):
+                return False
+        return True
+
     def load(self, container):
-        if len(self.containers) < self.maxAllContainers:
+        if self.canLoad(container):
             self.containers.append(container)
+            # Індекс тримає перший контейнер з цим ID; повтори лише рахуються
+            if container.ID in self.containerIndex:
+                self.duplicateIDs[container.ID] = self.duplicateIDs.get(container.ID, 0) + 1
+            else:
+                self.containerIndex[container.ID] = container
+            self.totalWeight += container.weight
+            self.totalConsumption += container.consumption()
+            for kind in containerKinds(type(container)):
+                self.typeCounts[kind] = self.typeCounts.get(kind, 0) + 1
             return True
         return False
 
+    def load_many(self, containers):
+        return [container for container in containers if self.load(container)]
+
     def unLoad(self, container):
         if container in self.containers:
-            self.containers.remove(container)
+            container = self.containers.pop(self.containers.index(container))
+            duplicates = self.duplicateIDs.get(container.ID)
+            if not duplicates:
+                del self.containerIndex[container.ID]
+            else:
+                if duplicates == 1:
+                    del self.duplicateIDs[container.ID]
+                else:
+                    self.duplicateIDs[container.ID] = duplicates - 1
+                if self.containerIndex[container.ID] is container:
+                    self.containerIndex[container.ID] = next(c for c in self.containers if c.ID == container.ID)
+            for kind in containerKinds(type(container)):
+                self.typeCounts[kind] -= 1
+            if self.containers:
+                self.totalWeight -= container.weight
+                self.totalConsumption -= container.consumption()
+            else:
+                self.totalWeight = 0
+                self.totalConsumption = 0
             return True
         return False
 
-# === Головна програма для роботи з JSON ===
-def main():
-    # Завантаження вхідних даних з файлу
-    with open("input.json", "r") as file:
-        data = json.load(file)
-
-    # Списки для збереження портів та кораблів
-    ports = []
-    ships = []
-
-    # Створення портів
-    for port_data in data["ports"]:
-        port = Port(port_data["ID"], port_data["latitude"], port_data["longitude"])
-        ports.append(port)
-
-    # Створення кораблів
-    for ship_data in data["ships"]:
-        port = next(p for p in ports if p.ID == ship_data["currentPortID"])
-        ship = Ship(ship_data["ID"], ship_data["fuel"], port, ship_data["totalWeightCapacity"], 
-                    ship_data["maxAllContainers"], ship_data["maxHeavyContainers"], 
-                    ship_data["maxRefrigeratedContainers"], ship_data["maxLiquidContainers"], 
-                    ship_data["fuelConsumptionPerKM"])
-        port.incomingShip(ship)
-        ships.append(ship)
-
-    # Обробка операцій (наприклад, навантаження, вивантаження, плавання)
-    for operation in data["operations"]:
-        if operation["action"] == "load":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            container = BasicContainer(operation["containerID"], operation["weight"])
-            ship.load(container)
-        elif operation["action"] == "unload":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            container = next(c for c in ship.containers if c.ID == operation["containerID"])
-            ship.unLoad(container)
-        elif operation["action"] == "sail":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            destination_port = next(p for p in ports if p.ID == operation["portID"])
-            ship.sailTo(destination_port)
-        elif operation["action"] == "refuel":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            ship.reFuel(operation["amount"])
-
-    # Формування вихідних даних
-    output_data = {}
-    for port in ports:
-        port_data = {
-            "lat": port.latitude,
-            "lon": port.longitude,
-            "basic_container": [c.ID for c in port.containers if isinstance(c, BasicContainer)],
-            "heavy_container": [c.ID for c in port.containers if isinstance(c, HeavyContainer)],
-            "liquid_container": [c.ID for c in port.containers if isinstance(c, LiquidContainer)],
-            "ship_0": {}
+    def containerCount(self, kind):
+        return self.typeCounts.get(kind, 0)
+
+    def findContainer(self, ID):
+        return self.containerIndex.get(ID)
+
+# === Індекси портів та кораблів ===
+class PortRegistry:
+    def __init__(self, ports=()):
+        self.ports = {}
+        for port in ports:
+            self.add(port)
+
+    def add(self, port):
+        self.ports[port.ID] = port
+        return port
+
+    def get(self, ID):
+        return self.ports[ID]
+
+    def __contains__(self, ID):
+        return ID in self.ports
+
+    def __iter__(self):
+        return iter(self.ports.values())
+
+    def __len__(self):
+        return len(self.ports)
+
+class Fleet:
+    def __init__(self, ships=()):
+        self.ships = {}
+        for ship in ships:
+            self.add(ship)
+
+    def add(self, ship):
+        self.ships[ship.ID] = ship
+        return ship
+
+    def get(self, ID):
+        return self.ships[ID]
+
+    def __contains__(self, ID):
+        return ID in self.ships
+
+    def __iter__(self):
+        return iter(self.ships.values())
+
+    def __len__(self):
+        return len(self.ships)
+
+    def shipsThatCanReach(self, port):
+        return [ship for ship in self.ships.values() if ship.canReach(port)]
+
+class LoadOp:
+    __slots__ = ("index", "ship", "container")
+    action = "load"
+
+    def __init__(self, index, ship, container):
+        self.index = index
+        self.ship = ship
+        self.container = container
+
+    def apply(self):
+        return self.ship.load(self.container)
+
+class UnloadOp:
+    __slots__ = ("index", "ship", "containerID")
+    action = "unload"
+
+    def __init__(self, index, ship, containerID):
+        self.index = index
+        self.ship = ship
+        self.containerID = containerID
+
+    def apply(self):
+        container = self.ship.findContainer(self.containerID)
+        return container is not None and self.ship.unLoad(container)
+
+class SailOp:
+    __slots__ = ("index", "ship", "port")
+    action = "sail"
+
+    def __init__(self, index, ship, port):
+        self.index = index
+        self.ship = ship
+        self.port = port
+
+    def apply(self):
+        return self.ship.sailTo(self.port)
+
+class RefuelOp:
+    __slots__ = ("index", "ship", "amount")
+    action = "refuel"
+
+    def __init__(self, index, ship, amount):
+        self.index = index
+        self.ship = ship
+        self.amount = amount
+
+    def apply(self):
+        self.ship.reFuel(self.amount)
+        return True
+
+OPERATION_FIELDS = {
+    "load": ("shipID", "containerID", "weight"),
+    "unload": ("shipID", "containerID"),
+    "sail": ("shipID", "portID"),
+    "refuel": ("shipID", "amount")
+}
+
+class OperationDispatcher:
+    # Операції один раз перетворюються на записи з уже знайденими кораблями та портами,
+    # тож цикл виконання не порівнює рядків і не шукає у словниках
+    def __init__(self, fleet, ports):
+        self.fleet = fleet
+        self.ports = ports
+        self.count = 0
+        self.rejected = []
+        self.compilers = {
+            "load": lambda index, ship, operation: LoadOp(index, ship, BasicContainer(operation["containerID"], operation["weight"])),
+            "unload": lambda index, ship, operation: UnloadOp(index, ship, operation["containerID"]),
+            "sail": self.compile_sail,
+            "refuel": lambda index, ship, operation: RefuelOp(index, ship, operation["amount"])
         }
+
+    def reject(self, index, action, shipID, reason):
+        self.rejected.append({"index": index, "action": action, "shipID": shipID, "reason": reason})
+
+    def validate(self, operation):
+        action = operation.get("action")
+        fields = OPERATION_FIELDS.get(action)
+        if fields is None:
+            return f"unknown action {action!r}"
+        for field in fields:
+            if field not in operation:
+                return f"missing field {field!r}"
+        if operation["shipID"] not in self.fleet:
+            return f"unknown ship {operation['shipID']!r}"
+        if action == "sail" and operation["portID"] not in self.ports:
+            return f"unknown port {operation['portID']!r}"
+        return None
+
+    def compile_sail(self, index, ship, operation):
+        return SailOp(index, ship, self.ports.get(operation["portID"]))
+
+    def compile(self, operation):
+        index = self.count
+        self.count += 1
+        reason = self.validate(operation)
+        if reason is not None:
+            self.reject(index, operation.get("action"), operation.get("shipID"), reason)
+            return None
+        return self.compilers[operation["action"]](index, self.fleet.get(operation["shipID"]), operation)
+
+    def compile_many(self, operations):
+        ops = []
+        for operation in operations:
+            op = self.compile(operation)
+            if op is not None:
+                ops.append(op)
+        return ops
+
+    def dispatch(self, operation):
+        op = self.compile(operation)
+        if op is None:
+            return False
+        if not op.apply():
+            self.reject(op.index, op.action, op.ship.ID, "refused")
+            return False
+        return True
+
+    def execute(self, ops):
+        for op in ops:
+            if not op.apply():
+                self.reject(op.index, op.action, op.ship.ID, "refused")
+
+    def run(self, operations):
+        self.execute(self.compile_many(operations))
+        return self.rejected
+
+# === Потокове читання вхідних даних ===
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+class JsonStream:
+    def __init__(self, file, chunkSize):
+        self.file = file
+        self.chunkSize = chunkSize
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.file.read(self.chunkSize)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the JSON stream")
+        self.pos += 1
+
+    def skip(self, char):
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Число, що закінчується на межі буфера (наприклад "1." з "1.5e3"), може бути неповним
+            if end < len(self.buffer) and self.buffer[end] not in NUMBER_CHARS or not self.fill():
+                self.pos = end
+                return value
+
+
+def stream_json_records(path, chunkSize=1 << 16):
+    # Розділи мають іти в порядку ports, ships, operations
+    with open(path, "r") as file:
+        stream = JsonStream(file, chunkSize)
+        stream.expect("{")
+        if stream.skip("}"):
+            return
+        while True:
+            section = stream.value()
+            stream.expect(":")
+            if stream.skip("["):
+                if not stream.skip("]"):
+                    while True:
+                        yield section, stream.value()
+                        if not stream.skip(","):
+                            stream.expect("]")
+                            break
+            else:
+                stream.value()
+            if not stream.skip(","):
+                stream.expect("}")
+                return
+
+
+JSONL_SECTIONS = {"port": "ports", "ship": "ships", "operation": "operations"}
+
+
+def stream_jsonl_records(path):
+    # Кожен рядок - окремий запис з полем "kind": port, ship або operation
+    with open(path, "r") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield JSONL_SECTIONS[record["kind"]], record
+
+
+class Progress:
+    def __init__(self, every=0):
+        self.every = every
+        self.count = 0
+        self.start = time.perf_counter()
+
+    def tick(self):
+        self.count += 1
+        if self.every and self.count % self.every == 0:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.count / elapsed if elapsed else 0.0
+        print(f"Processed {self.count} records ({rate:.0f} records/s)")
+
+
+# === Формування звіту ===
+PORT_REPORT_BUCKETS = {
+    BasicContainer: "basic_container",
+    HeavyContainer: "heavy_container",
+    LiquidContainer: "liquid_container"
+}
+SHIP_REPORT_BUCKETS = {**PORT_REPORT_BUCKETS, RefrigeratedContainer: "refrigerated_container"}
+
+def bucketize(containers, buckets):
+    result = {name: [] for name in buckets.values()}
+    for container in containers:
+        for kind in containerKinds(type(container)):
+            name = buckets.get(kind)
+            if name is not None:
+                result[name].append(container.ID)
+    return result
+
+class ReportWriter:
+    def __init__(self, file, pretty=True):
+        self.file = file
+        self.pretty = pretty
+        self.count = 0
+
+    def port_data(self, port):
+        port_data = {"lat": port.latitude, "lon": port.longitude, **bucketize(port.containers, PORT_REPORT_BUCKETS), "ship_0": {}}
         for ship in port.current:
-            ship_data = {
-                "fuel_left": round(ship.fuel, 2),
-                "basic_container": [c.ID for c in ship.containers if isinstance(c, BasicContainer)],
-                "heavy_container": [c.ID for c in ship.containers if isinstance(c, HeavyContainer)],
-                "liquid_container": [c.ID for c in ship.containers if isinstance(c, LiquidContainer)],
-                "refrigerated_container": [c.ID for c in ship.containers if isinstance(c, RefrigeratedContainer)]
-            }
-            port_data[f"ship_{ship.ID}"] = ship_data
-        output_data[f"Port {port.ID}"] = port_data
-
-    # Запис вихідних даних у файл
-    with open("output.json", "w") as file:
-        json.dump(output_data, file, indent=4)
+            port_data[f"ship_{ship.ID}"] = {"fuel_left": round(ship.fuel, 2), **bucketize(ship.containers, SHIP_REPORT_BUCKETS)}
+        return port_data
+
+    def write_port(self, port):
+        key = json.dumps(f"Port {port.ID}")
+        port_data = self.port_data(port)
+        if self.pretty:
+            body = json.dumps(port_data, indent=4).replace("\n", "\n    ")
+            self.file.write(("{\n    " if self.count == 0 else ",\n    ") + key + ": " + body)
+        else:
+            if orjson is not None:
+                body = orjson.dumps(port_data).decode()
+            else:
+                body = json.dumps(port_data, separators=(",", ":"))
+            self.file.write(("{" if self.count == 0 else ",") + key + ":" + body)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.file.write("{}")
+        else:
+            self.file.write("\n}" if self.pretty else "}")
+
+def write_report(ports, path, pretty=True):
+    with open(path, "w") as file:
+        writer = ReportWriter(file, pretty)
+        for port in ports:
+            writer.write_port(port)
+        writer.close()
+
+# === Головна програма для роботи з JSON ===
+def main(inputPath="input.json", outputPath="output.json", progressEvery=0, errorsPath=None):
+    # Потокове завантаження вхідних даних з файлу
+    if inputPath.endswith(".jsonl"):
+        records = stream_jsonl_records(inputPath)
+    else:
+        records = stream_json_records(inputPath)
+    progress = Progress(progressEvery)
+
+    # Індекси для збереження портів та кораблів
+    ports = PortRegistry()
+    ships = Fleet()
+    dispatcher = OperationDispatcher(ships, ports)
+
+    for section, record in records:
+        # Створення портів
+        if section == "ports":
+            ports.add(Port(record["ID"], record["latitude"], record["longitude"]))
+        # Створення кораблів
+        elif section == "ships":
+            port = ports.get(record["currentPortID"])
+            ship = Ship(record["ID"], record["fuel"], port, record["totalWeightCapacity"],
+                        record["maxAllContainers"], record["maxHeavyContainers"],
+                        record["maxRefrigeratedContainers"], record["maxLiquidContainers"],
+                        record["fuelConsumptionPerKM"])
+            port.incomingShip(ship)
+            ships.add(ship)
+        # Обробка операцій (наприклад, навантаження, вивантаження, плавання); кожна компілюється при надходженні
+        elif section == "operations":
+            dispatcher.dispatch(record)
+        progress.tick()
+    if progressEvery:
+        progress.report()
+
+    # Потоковий запис вихідних даних у файл
+    write_report(ports, outputPath)
+
+    # Звіт про відхилені операції
+    if errorsPath is not None:
+        with open(errorsPath, "w") as file:
+            json.dump(dispatcher.rejected, file, indent=4)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from lab2 import JsonStream, stream_json_records, stream_jsonl_records, main
+
+INPUT = {
+    "ports": [
+        {"ID": 1, "latitude": 50.45, "longitude": 30.52},
+        {"ID": 2, "latitude": 52.37, "longitude": 4.9}
+    ],
+    "ships": [
+        {"ID": 1, "fuel": 1500.0, "currentPortID": 1, "totalWeightCapacity": 1000, "maxAllContainers": 10,
+         "maxHeavyContainers": 5, "maxRefrigeratedContainers": 2, "maxLiquidContainers": 3,
+         "fuelConsumptionPerKM": 1.5e1},
+        {"ID": 2, "fuel": 100, "currentPortID": 2, "totalWeightCapacity": 500, "maxAllContainers": 1,
+         "maxHeavyContainers": 1, "maxRefrigeratedContainers": 0, "maxLiquidContainers": 0,
+         "fuelConsumptionPerKM": 2}
+    ],
+    "operations": [
+        {"action": "load", "shipID": 1, "containerID": 10, "weight": 300},
+        {"action": "load", "shipID": 1, "containerID": 11, "weight": 200},
+        {"action": "unload", "shipID": 1, "containerID": 11},
+        {"action": "sail", "shipID": 1, "portID": 2},
+        {"action": "load", "shipID": 2, "containerID": 12, "weight": 100},
+        {"action": "load", "shipID": 2, "containerID": 13, "weight": 100},
+        {"action": "refuel", "shipID": 2, "amount": 2.5e2},
+        {"action": "sail", "shipID": 9, "portID": 1}
+    ]
+}
+
+
+def expected_records():
+    return [(section, record) for section in ("ports", "ships", "operations") for record in INPUT[section]]
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_values_across_chunk_sizes(self):
+        text = '{"ports": [1.5e3, -0.25, 12345678901234567890, true, null, "a\\"b", {"x": [1E-2]}], "n": 7}'
+        for chunkSize in range(1, 12):
+            stream = JsonStream(io.StringIO(text), chunkSize)
+            stream.expect("{")
+            self.assertEqual(stream.value(), "ports")
+            stream.expect(":")
+            stream.expect("[")
+            values = [stream.value()]
+            while stream.skip(","):
+                values.append(stream.value())
+            stream.expect("]")
+            self.assertEqual(values, [1500.0, -0.25, 12345678901234567890, True, None, 'a"b', {"x": [0.01]}])
+
+    def test_records_match_json_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.json")
+            with open(path, "w") as file:
+                json.dump(INPUT, file, indent=2)
+            for chunkSize in (1, 2, 3, 5, 8, 64, 1 << 16):
+                self.assertEqual(list(stream_json_records(path, chunkSize)), expected_records())
+
+    def test_jsonl_records(self):
+        kinds = {"ports": "port", "ships": "ship", "operations": "operation"}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.jsonl")
+            with open(path, "w") as file:
+                for section, record in expected_records():
+                    file.write(json.dumps({"kind": kinds[section], **record}) + "\n\n")
+            records = list(stream_jsonl_records(path))
+        self.assertEqual([section for section, _ in records], [section for section, _ in expected_records()])
+        self.assertEqual(records[3][1]["fuelConsumptionPerKM"], 2)
+
+
+class TestMain(unittest.TestCase):
+
+    def run_main(self, directory, name):
+        kinds = {"ports": "port", "ships": "ship", "operations": "operation"}
+        path = os.path.join(directory, name)
+        with open(path, "w") as file:
+            if name.endswith(".jsonl"):
+                for section, record in expected_records():
+                    file.write(json.dumps({"kind": kinds[section], **record}) + "\n")
+            else:
+                json.dump(INPUT, file)
+        output = os.path.join(directory, name + ".out")
+        errors = os.path.join(directory, name + ".errors")
+        main(path, output, errorsPath=errors)
+        with open(output) as file, open(errors) as errorFile:
+            return json.load(file), json.load(errorFile)
+
+    def test_json_and_jsonl_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report, errors = self.run_main(directory, "input.json")
+            self.assertEqual(self.run_main(directory, "input.jsonl"), (report, errors))
+
+        self.assertEqual(list(report), ["Port 1", "Port 2"])
+        self.assertEqual(report["Port 1"], {"lat": 50.45, "lon": 30.52, "basic_container": [],
+                                            "heavy_container": [], "liquid_container": [], "ship_0": {}})
+        self.assertEqual(report["Port 2"]["ship_1"], {"fuel_left": 364.62, "basic_container": [10],
+                                                      "heavy_container": [], "liquid_container": [],
+                                                      "refrigerated_container": []})
+        self.assertEqual(report["Port 2"]["ship_2"]["fuel_left"], 350)
+        self.assertEqual(report["Port 2"]["ship_2"]["basic_container"], [12])
+        self.assertEqual([(error["index"], error["reason"]) for error in errors],
+                         [(5, "refused"), (7, "unknown ship 9")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from lab3 import Port, ShipBuilder, ContainerFactory, Fleet, PortRegistry, OperationDispatcher, ReportWriter
+from load_planner import LoadPlanner
+from oplog import OperationLog, read_log, recover, JournaledDispatcher
+import synthetic
+
+
+def make_ships(count, port):
+    return [ShipBuilder(ID=i, fuel=0, currentPort=port).build() for i in range(count)]
+
+
+def bench_port_visits(history_sizes=(1000, 10000, 100000), visits=10000):
+    results = []
+    for size in history_sizes:
+        port = Port(ID=1, latitude=0.0, longitude=0.0)
+        for ship in make_ships(size, port):
+            port.incomingShip(ship)
+            port.outgoingShip(ship)
+        visitors = make_ships(visits, port)
+        start = time.perf_counter()
+        for ship in visitors:
+            port.incomingShip(ship)
+            port.outgoingShip(ship)
+        elapsed = time.perf_counter() - start
+        results.append((size, elapsed / visits * 1e9))
+    return results
+
+
+def bench_load_planner(container_counts=(10, 20, 40), ship_count=4, time_budget=1.0, seed=1):
+    results = []
+    for count in container_counts:
+        rng = random.Random(seed)
+        port = Port(ID=1, latitude=0.0, longitude=0.0)
+        for i in range(ship_count):
+            ship = ShipBuilder(ID=i, fuel=0, currentPort=port) \
+                .set_total_weight_capacity(rng.choice([300, 500, 800])) \
+                .set_container_limits(8, 4, 2, 2) \
+                .set_fuel_consumption(rng.uniform(0.5, 2.0)) \
+                .build()
+            port.incomingShip(ship)
+        containers = [ContainerFactory.create_container(rng.choice(["basic", "heavy", "refrigerated", "liquid"]),
+                                                        i, rng.randint(20, 150)) for i in range(count)]
+        planner = LoadPlanner.for_port(port)
+        for mode, plan_batch in (("greedy", planner.greedy),
+                                 ("branch_and_bound", lambda cs: planner.branch_and_bound(cs, time_budget))):
+            start = time.perf_counter()
+            plan = plan_batch(containers)
+            elapsed = time.perf_counter() - start
+            results.append((count, mode, plan.loadedWeight, plan.fuelPerTonne, plan.optimal, elapsed))
+    return results
+
+
+def bench_oplog(operation_counts=(10000, 100000), sync_every=1000, seed=1):
+    results = []
+    for count in operation_counts:
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(20, rng)
+        ships = synthetic.make_ships(200, ports, rng)
+        operations = synthetic.make_operations(count, ships, ports, rng)
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "operations.log")
+            snapshot_path = os.path.join(directory, "state.snap")
+            with OperationLog(log_path, syncEvery=sync_every) as log:
+                start = time.perf_counter()
+                log.append_many(operations)
+                log.sync()
+                append = time.perf_counter() - start
+
+            start = time.perf_counter()
+            replayed = sum(1 for _ in read_log(log_path))
+            decode = time.perf_counter() - start
+
+            with OperationLog(os.path.join(directory, "journal.log"), syncEvery=sync_every) as log:
+                JournaledDispatcher(ports, ships, log, snapshot_path, checkpointEvery=0)
+            start = time.perf_counter()
+            recover(snapshot_path, log_path)
+            recovery = time.perf_counter() - start
+        results.append((count, count / append, replayed / decode, count / recovery))
+    return results
+
+
+SCALES = {
+    "small": {"ports": 10, "ships": 100, "containers": 1000, "operations": 10000},
+    "medium": {"ports": 50, "ships": 1000, "containers": 10000, "operations": 100000},
+    "large": {"ports": 200, "ships": 10000, "containers": 100000, "operations": 1000000}
+}
+
+
+def measure(setup, run, repeats):
+    # Найкращий з кількох прогонів, у наносекундах на операцію; підготовка стану не вимірюється
+    best = None
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        count = run(state)
+        elapsed = (time.perf_counter() - start) / count * 1e9
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def case_load_unload(scale, seed):
+    def setup():
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(scale["ports"], rng)
+        ships = synthetic.make_ships(scale["ships"], ports, rng, capacity=float("inf"),
+                                     maxContainers=4 * scale["containers"])
+        containers = synthetic.make_containers(scale["containers"], rng)
+        return [(ships[i % len(ships)], container) for i, container in enumerate(containers)]
+
+    def run(pairs):
+        for ship, container in pairs:
+            ship.load(container)
+        for ship, container in reversed(pairs):
+            ship.unLoad(container)
+        return 2 * len(pairs)
+    return setup, run
+
+
+def case_sail(scale, seed):
+    def setup():
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(scale["ports"], rng)
+        ships = synthetic.make_ships(scale["ships"], ports, rng, fuel=float("inf"))
+        return [(ship, rng.choice(ports)) for ship in ships for _ in range(scale["operations"] // len(ships))]
+
+    def run(voyages):
+        for ship, port in voyages:
+            ship.sailTo(port)
+        return len(voyages)
+    return setup, run
+
+
+def case_port_visits(scale, seed):
+    def setup():
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(scale["ports"], rng)
+        ships = synthetic.make_ships(scale["ships"], ports, rng)
+        return [(rng.choice(ports), rng.choice(ships)) for _ in range(scale["operations"])]
+
+    def run(visits):
+        for port, ship in visits:
+            port.incomingShip(ship)
+            port.outgoingShip(ship)
+        return 2 * len(visits)
+    return setup, run
+
+
+def case_replay(scale, seed):
+    def setup():
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(scale["ports"], rng)
+        ships = synthetic.make_ships(scale["ships"], ports, rng)
+        operations = synthetic.make_operations(scale["operations"], ships, ports, rng)
+        return OperationDispatcher(Fleet(ships), PortRegistry(ports)), operations
+
+    def run(state):
+        dispatcher, operations = state
+        dispatcher.run(operations)
+        return len(operations)
+    return setup, run
+
+
+def case_report(scale, seed):
+    def setup():
+        rng = random.Random(seed)
+        ports = synthetic.make_ports(scale["ports"], rng)
+        ships = synthetic.make_ships(scale["ships"], ports, rng)
+        OperationDispatcher(Fleet(ships), PortRegistry(ports)).run(
+            synthetic.make_operations(scale["containers"], ships, ports, rng))
+        return ports
+
+    def run(ports):
+        writer = ReportWriter(io.StringIO())
+        for port in ports:
+            writer.write_port(port)
+        writer.close()
+        return len(ports)
+    return setup, run
+
+
+CASES = {
+    "load_unload": case_load_unload,
+    "sail": case_sail,
+    "port_visits": case_port_visits,
+    "replay": case_replay,
+    "report": case_report
+}
+
+
+def run_suite(scales=("small",), cases=tuple(CASES), repeats=3, seed=1):
+    results = {}
+    for scale in scales:
+        for case in cases:
+            setup, run = CASES[case](SCALES[scale], seed)
+            results[f"{scale}/{case}"] = measure(setup, run, repeats)
+    return results
+
+
+def save_baseline(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=4, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def compare(results, baseline, threshold=0.1):
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            rows.append((name, None, current, None, "new"))
+            continue
+        ratio = current / previous
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, previous, current, ratio, status))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'benchmark':<24} {'baseline ns':>12} {'current ns':>12} {'ratio':>7}  status")
+    for name, previous, current, ratio, status in rows:
+        previous = "-" if previous is None else f"{previous:.0f}"
+        ratio = "-" if ratio is None else f"{ratio:.2f}"
+        print(f"{name:<24} {previous:>12} {current:>12.0f} {ratio:>7}  {status}")
+
+
+def print_legacy():
+    print("Port visits (history size -> ns per visit)")
+    for size, ns in bench_port_visits():
+        print(f"{size:>10} {ns:>10.0f}")
+    print("Load planner (containers, mode -> loaded weight, fuel per tonne, proven optimal, seconds)")
+    for count, mode, weight, per_tonne, optimal, elapsed in bench_load_planner():
+        print(f"{count:>10} {mode:<17} {weight:>8} {per_tonne:>10.5f} {str(optimal):>6} {elapsed:>8.3f}")
+    print("Operation log (operations -> appended/s, decoded/s, recovered/s)")
+    for count, append, decode, recovery in bench_oplog():
+        print(f"{count:>10} {append:>12.0f} {decode:>12.0f} {recovery:>12.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shipping model benchmarks")
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["small"])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="store the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    parser.add_argument("--legacy", action="store_true", help="also run the port history, planner and log benchmarks")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.scales, args.cases, args.repeats, args.seed)
+    if args.compare:
+        rows = compare(results, load_baseline(args.compare), args.threshold)
+    else:
+        rows = [(name, None, current, None, "") for name, current in results.items()]
+    print_comparison(rows)
+    if args.save:
+        save_baseline(results, args.save)
+    if args.legacy:
+        print_legacy()
+    return 1 if any(row[4] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
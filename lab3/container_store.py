@@ -0,0 +1,128 @@
+from array import array
+from operator import mul
+from types import MemberDescriptorType
+
+
+# Службові атрибути класу, які представлення не копіює з типу контейнера
+_CLASS_ATTRIBUTES = frozenset(("__slots__", "__dict__", "__weakref__", "__module__", "__qualname__", "__doc__",
+                               "__init__", "__abstractmethods__", "_abc_impl"))
+
+
+def _column(name, column):
+    def get(self):
+        return getattr(self.store, column)[self.index]
+
+    def set(self, value):
+        getattr(self.store, column)[self.index] = value
+
+    return property(get, set, doc=name)
+
+
+def _eq(self, other):
+    if isinstance(other, ContainerView):
+        return self.store is other.store and self.index == other.index
+    return NotImplemented
+
+
+def _hash(self):
+    return hash((id(self.store), self.index))
+
+
+class ContainerView:
+    __slots__ = ()
+
+
+def _owner(kind, name):
+    return next(base for base in kind.__mro__ if name in vars(base))
+
+
+def make_view_class(kind):
+    # Успадкування від kind принесло б порожні слоти ID та weight у кожне представлення, тому методи
+    # копіюються, а isinstance забезпечує реєстрація віртуального підкласу
+    namespace = {}
+    for base in reversed(kind.__mro__[:-1]):
+        for name, value in vars(base).items():
+            if name not in _CLASS_ATTRIBUTES and not isinstance(value, MemberDescriptorType):
+                namespace[name] = value
+    namespace.update({
+        "__slots__": ("store", "index"),
+        "containerKind": kind,
+        "ID": _column("ID", "IDs"),
+        "weight": _column("weight", "weights"),
+        "__eq__": _eq,
+        "__hash__": _hash
+    })
+    view = type(kind.__name__ + "View", (ContainerView,), namespace)
+    kind.register(view)
+    return view
+
+
+class ContainerStore:
+    # Контейнери зберігаються стовпцями; представлення поводяться як звичайні контейнери
+    def __init__(self):
+        self.IDs = array('q')
+        self.weights = array('d')
+        self.typeCodes = array('B')
+        self.kinds = []
+        self.codes = {}
+        self.viewClasses = []
+
+    @classmethod
+    def from_containers(cls, containers):
+        store = cls()
+        for container in containers:
+            store.add(type(container), container.ID, container.weight)
+        return store
+
+    def code_of(self, kind):
+        code = self.codes.get(kind)
+        if code is None:
+            # total_consumption рахує fuelRate * weight, тож consumption() не може бути перевизначено без fuelRate
+            if kind.fuelRate is None or not issubclass(_owner(kind, "fuelRate"), _owner(kind, "consumption")):
+                raise ValueError(f"{kind.__name__} must define fuelRate together with consumption()")
+            if len(self.kinds) == 256:
+                raise ValueError("Too many container types in one store")
+            code = self.codes[kind] = len(self.kinds)
+            self.kinds.append(kind)
+            self.viewClasses.append(make_view_class(kind))
+        return code
+
+    def add(self, kind, ID, weight):
+        code = self.code_of(kind)
+        self.IDs.append(ID)
+        self.weights.append(weight)
+        self.typeCodes.append(code)
+        return self.view(len(self.IDs) - 1)
+
+    def add_many(self, kinds, IDs, weights):
+        # Повертає діапазон індексів; представлення створюються лише на вимогу через view()
+        start = len(self.IDs)
+        self.typeCodes.extend(self.code_of(kind) for kind in kinds)
+        self.IDs.extend(IDs)
+        self.weights.extend(weights)
+        if not len(self.IDs) == len(self.weights) == len(self.typeCodes):
+            del self.IDs[start:], self.weights[start:], self.typeCodes[start:]
+            raise ValueError("Container columns must have the same length")
+        return range(start, len(self.IDs))
+
+    def view(self, index):
+        view = object.__new__(self.viewClasses[self.typeCodes[index]])
+        view.store = self
+        view.index = index
+        return view
+
+    def materialize(self, index):
+        return self.kinds[self.typeCodes[index]](self.IDs[index], self.weights[index])
+
+    def __len__(self):
+        return len(self.IDs)
+
+    def __iter__(self):
+        return (self.view(i) for i in range(len(self.IDs)))
+
+    def total_consumption(self):
+        rates = [kind.fuelRate for kind in self.kinds]
+        return sum(map(mul, map(rates.__getitem__, self.typeCodes), self.weights))
+
+    def total_weight(self):
+        return sum(self.weights)
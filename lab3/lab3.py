@@ -1,7 +1,14 @@
 import math
 import json
+import time
+from collections import OrderedDict
 from abc import ABC, abstractmethod
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class IPort(ABC):
     @abstractmethod
     def incomingShip(self, ship):
@@ -29,6 +36,9 @@ class IShip(ABC):
         pass
 
 class Container(ABC):
+    __slots__ = ("ID", "weight")
+    fuelRate = None
+
     def __init__(self, ID, weight):
         self.ID = ID
         self.weight = weight
@@ -38,52 +48,105 @@ class Container(ABC):
         pass
 
 class BasicContainer(Container):
+    __slots__ = ()
+    fuelRate = 2.5
+
     def consumption(self):
-        return 2.5 * self.weight
+        return self.fuelRate * self.weight
 
 class HeavyContainer(Container):
+    __slots__ = ()
+    fuelRate = 3.0
+
     def consumption(self):
-        return 3.0 * self.weight
+        return self.fuelRate * self.weight
 
 class RefrigeratedContainer(HeavyContainer):
+    __slots__ = ()
+    fuelRate = 5.0
+
     def consumption(self):
-        return 5.0 * self.weight
+        return self.fuelRate * self.weight
 
 class LiquidContainer(HeavyContainer):
+    __slots__ = ()
+    fuelRate = 4.0
+
     def consumption(self):
-        return 4.0 * self.weight
+        return self.fuelRate * self.weight
+
+_containerKinds = {}
+
+def containerKinds(cls):
+    # Тип контейнера та всі його батьківські типи, щоб лічильники відповідали isinstance;
+    # представлення зі сховища стовпців - віртуальні підкласи, тож для них береться тип, який вони представляють
+    kinds = _containerKinds.get(cls)
+    if kinds is None:
+        kind = getattr(cls, "containerKind", cls)
+        kinds = _containerKinds[cls] = tuple(c for c in kind.__mro__ if issubclass(c, Container))
+    return kinds
 
 class ContainerFactory:
+    registry = {
+        "basic": BasicContainer,
+        "heavy": HeavyContainer,
+        "refrigerated": RefrigeratedContainer,
+        "liquid": LiquidContainer
+    }
+
+    @classmethod
+    def register(cls, container_type, kind):
+        cls.registry[container_type] = kind
+        return kind
+
+    @classmethod
+    def kind_of(cls, container_type):
+        kind = cls.registry.get(container_type)
+        if kind is None:
+            raise ValueError("Unknown container type")
+        return kind
+
     @staticmethod
     def create_container(container_type, ID, weight):
-        if container_type == "basic":
-            return BasicContainer(ID, weight)
-        elif container_type == "heavy":
-            return HeavyContainer(ID, weight)
-        elif container_type == "refrigerated":
-            return RefrigeratedContainer(ID, weight)
-        elif container_type == "liquid":
-            return LiquidContainer(ID, weight)
-        else:
-            raise ValueError("Unknown container type")
+        return ContainerFactory.kind_of(container_type)(ID, weight)
+
+    @classmethod
+    def create_many(cls, container_types, IDs, weights, store=None):
+        kinds = {container_type: cls.kind_of(container_type) for container_type in set(container_types)}
+        kinds = [kinds[container_type] for container_type in container_types]
+        # Зі сховищем повертається діапазон індексів у ньому, а не список представлень
+        if store is not None:
+            return store.add_many(kinds, IDs, weights)
+        return [kind(ID, weight) for kind, ID, weight in zip(kinds, IDs, weights)]
 
 class Port(IPort):
-    def __init__(self, ID, latitude, longitude):
+    def __init__(self, ID, latitude, longitude, historyLimit=None, historyWindow=None, clock=time.monotonic):
         self.ID = ID
         self.latitude = latitude
         self.longitude = longitude
         self.containers = []
-        self.history = []
-        self.current = []
+        self.historyLimit = historyLimit
+        self.historyWindow = historyWindow
+        self.clock = clock
+        self.history = OrderedDict()
+        self.current = {}
 
     def incomingShip(self, ship):
-        if ship not in self.current:
-            self.current.append(ship)
+        self.current.setdefault(ship)
     
     def outgoingShip(self, ship):
-        if ship not in self.history:
-            self.history.append(ship)
-        self.current.remove(ship)
+        if self.historyWindow is not None:
+            # Історія впорядкована за останнім відплиттям, застарілі записи на початку
+            now = self.clock()
+            self.history[ship] = now
+            self.history.move_to_end(ship)
+            while next(iter(self.history.values())) < now - self.historyWindow:
+                self.history.popitem(last=False)
+        elif ship not in self.history:
+            self.history[ship] = None
+            if self.historyLimit is not None and len(self.history) > self.historyLimit:
+                self.history.popitem(last=False)
+        del self.current[ship]
 
     def getDistance(self, other):
         return math.sqrt((self.latitude - other.latitude)**2 + (self.longitude - other.longitude)**2)
@@ -121,6 +184,12 @@ class ShipBuilder:
                     self.fuelConsumptionPerKM)
 
 class Ship(IShip):
+    typeLimits = {
+        HeavyContainer: "maxHeavyContainers",
+        RefrigeratedContainer: "maxRefrigeratedContainers",
+        LiquidContainer: "maxLiquidContainers"
+    }
+
     def __init__(self, ID, fuel, currentPort, totalWeightCapacity, maxAllContainers, maxHeavyContainers, maxRefrigeratedContainers, maxLiquidContainers, fuelConsumptionPerKM):
         self.ID = ID
         self.fuel = fuel
@@ -132,10 +201,20 @@ class Ship(IShip):
         self.maxLiquidContainers = maxLiquidContainers
         self.fuelConsumptionPerKM = fuelConsumptionPerKM
         self.containers = []
+        self.containerIndex = {}
+        self.duplicateIDs = {}
+        self.totalWeight = 0
+        self.totalConsumption = 0
+        self.typeCounts = {}
+
+    def tripConsumption(self, port):
+        return self.fuelConsumptionPerKM * self.currentPort.getDistance(port) + self.totalConsumption
+
+    def canReach(self, port):
+        return self.fuel >= self.tripConsumption(port)
 
     def sailTo(self, port):
-        distance = self.currentPort.getDistance(port)
-        totalConsumption = self.fuelConsumptionPerKM * distance + sum([c.consumption() for c in self.containers])
+        totalConsumption = self.tripConsumption(port)
         if self.fuel >= totalConsumption:
             self.fuel -= totalConsumption
             self.currentPort.outgoingShip(self)
@@ -147,18 +226,320 @@ class Ship(IShip):
     def reFuel(self, amount):
         self.fuel += amount
 
+    def canLoad(self, container):
+        if len(self.containers) >= self.maxAllContainers:
+            return False
+        if self.totalWeight + container.weight > self.totalWeightCapacity:
+            return False
+        for kind in containerKinds(type(container)):
+            limit = self.typeLimits.get(kind)
+            if limit is not None and self.typeCounts.get(kind, 0) >= getattr(self, limit):
+                return False
+        return True
+
     def load(self, container):
-        if len(self.containers) < self.maxAllContainers:
+        if self.canLoad(container):
             self.containers.append(container)
+            # Індекс тримає перший контейнер з цим ID; повтори лише рахуються
+            if container.ID in self.containerIndex:
+                self.duplicateIDs[container.ID] = self.duplicateIDs.get(container.ID, 0) + 1
+            else:
+                self.containerIndex[container.ID] = container
+            self.totalWeight += container.weight
+            self.totalConsumption += container.consumption()
+            for kind in containerKinds(type(container)):
+                self.typeCounts[kind] = self.typeCounts.get(kind, 0) + 1
             return True
         return False
 
+    def load_many(self, containers):
+        return [container for container in containers if self.load(container)]
+
     def unLoad(self, container):
         if container in self.containers:
-            self.containers.remove(container)
+            container = self.containers.pop(self.containers.index(container))
+            duplicates = self.duplicateIDs.get(container.ID)
+            if not duplicates:
+                del self.containerIndex[container.ID]
+            else:
+                if duplicates == 1:
+                    del self.duplicateIDs[container.ID]
+                else:
+                    self.duplicateIDs[container.ID] = duplicates - 1
+                if self.containerIndex[container.ID] is container:
+                    self.containerIndex[container.ID] = next(c for c in self.containers if c.ID == container.ID)
+            for kind in containerKinds(type(container)):
+                self.typeCounts[kind] -= 1
+            if self.containers:
+                self.totalWeight -= container.weight
+                self.totalConsumption -= container.consumption()
+            else:
+                self.totalWeight = 0
+                self.totalConsumption = 0
             return True
         return False
+
+    def containerCount(self, kind):
+        return self.typeCounts.get(kind, 0)
+
+    def findContainer(self, ID):
+        return self.containerIndex.get(ID)
     
+class PortRegistry:
+    def __init__(self, ports=()):
+        self.ports = {}
+        for port in ports:
+            self.add(port)
+
+    def add(self, port):
+        self.ports[port.ID] = port
+        return port
+
+    def get(self, ID):
+        return self.ports[ID]
+
+    def __contains__(self, ID):
+        return ID in self.ports
+
+    def __iter__(self):
+        return iter(self.ports.values())
+
+    def __len__(self):
+        return len(self.ports)
+
+class Fleet:
+    def __init__(self, ships=()):
+        self.ships = {}
+        for ship in ships:
+            self.add(ship)
+
+    def add(self, ship):
+        self.ships[ship.ID] = ship
+        return ship
+
+    def get(self, ID):
+        return self.ships[ID]
+
+    def __contains__(self, ID):
+        return ID in self.ships
+
+    def __iter__(self):
+        return iter(self.ships.values())
+
+    def __len__(self):
+        return len(self.ships)
+
+    def shipsThatCanReach(self, port):
+        return [ship for ship in self.ships.values() if ship.canReach(port)]
+
+# === Скомпільовані операції ===
+class LoadOp:
+    __slots__ = ("index", "ship", "container")
+    action = "load"
+
+    def __init__(self, index, ship, container):
+        self.index = index
+        self.ship = ship
+        self.container = container
+
+    def apply(self):
+        return self.ship.load(self.container)
+
+class UnloadOp:
+    __slots__ = ("index", "ship", "containerID")
+    action = "unload"
+
+    def __init__(self, index, ship, containerID):
+        self.index = index
+        self.ship = ship
+        self.containerID = containerID
+
+    def apply(self):
+        container = self.ship.findContainer(self.containerID)
+        return container is not None and self.ship.unLoad(container)
+
+class SailOp:
+    __slots__ = ("index", "ship", "port")
+    action = "sail"
+
+    def __init__(self, index, ship, port):
+        self.index = index
+        self.ship = ship
+        self.port = port
+
+    def apply(self):
+        return self.ship.sailTo(self.port)
+
+class RefuelOp:
+    __slots__ = ("index", "ship", "amount")
+    action = "refuel"
+
+    def __init__(self, index, ship, amount):
+        self.index = index
+        self.ship = ship
+        self.amount = amount
+
+    def apply(self):
+        self.ship.reFuel(self.amount)
+        return True
+
+OPERATION_FIELDS = {
+    "load": ("shipID", "type", "containerID", "weight"),
+    "unload": ("shipID", "containerID"),
+    "sail": ("shipID", "portID"),
+    "refuel": ("shipID", "amount")
+}
+
+class OperationDispatcher:
+    # Операції один раз перетворюються на записи з уже знайденими кораблями та портами,
+    # тож цикл виконання не порівнює рядків і не шукає у словниках
+    def __init__(self, fleet, ports):
+        self.fleet = fleet
+        self.ports = ports
+        self.count = 0
+        self.rejected = []
+        self.compilers = {
+            "load": self.compile_load,
+            "unload": lambda index, ship, operation: UnloadOp(index, ship, operation["containerID"]),
+            "sail": self.compile_sail,
+            "refuel": lambda index, ship, operation: RefuelOp(index, ship, operation["amount"])
+        }
+
+    def reject(self, index, action, shipID, reason):
+        self.rejected.append({"index": index, "action": action, "shipID": shipID, "reason": reason})
+
+    def validate(self, operation):
+        action = operation.get("action")
+        fields = OPERATION_FIELDS.get(action)
+        if fields is None:
+            return f"unknown action {action!r}"
+        for field in fields:
+            if field not in operation:
+                return f"missing field {field!r}"
+        if operation["shipID"] not in self.fleet:
+            return f"unknown ship {operation['shipID']!r}"
+        if action == "sail" and operation["portID"] not in self.ports:
+            return f"unknown port {operation['portID']!r}"
+        if action == "load" and operation["type"] not in ContainerFactory.registry:
+            return f"unknown container type {operation['type']!r}"
+        return None
+
+    def compile_load(self, index, ship, operation, container=None):
+        if container is None:
+            container = ContainerFactory.create_container(operation["type"], operation["containerID"], operation["weight"])
+        return LoadOp(index, ship, container)
+
+    def compile_sail(self, index, ship, operation):
+        return SailOp(index, ship, self.ports.get(operation["portID"]))
+
+    def compile(self, operation):
+        index = self.count
+        self.count += 1
+        reason = self.validate(operation)
+        if reason is not None:
+            self.reject(index, operation.get("action"), operation.get("shipID"), reason)
+            return None
+        return self.compilers[operation["action"]](index, self.fleet.get(operation["shipID"]), operation)
+
+    def compile_many(self, operations):
+        # Контейнери для всіх завантажень створюються одним викликом фабрики
+        valid = []
+        loads = []
+        for operation in operations:
+            index = self.count
+            self.count += 1
+            reason = self.validate(operation)
+            if reason is not None:
+                self.reject(index, operation.get("action"), operation.get("shipID"), reason)
+            else:
+                valid.append((index, operation))
+                if operation["action"] == "load":
+                    loads.append(operation)
+        containers = iter(ContainerFactory.create_many([operation["type"] for operation in loads],
+                                                       [operation["containerID"] for operation in loads],
+                                                       [operation["weight"] for operation in loads]))
+        ops = []
+        for index, operation in valid:
+            ship = self.fleet.get(operation["shipID"])
+            if operation["action"] == "load":
+                ops.append(self.compile_load(index, ship, operation, next(containers)))
+            else:
+                ops.append(self.compilers[operation["action"]](index, ship, operation))
+        return ops
+
+    def dispatch(self, operation):
+        op = self.compile(operation)
+        if op is None:
+            return False
+        if not op.apply():
+            self.reject(op.index, op.action, op.ship.ID, "refused")
+            return False
+        return True
+
+    def execute(self, ops):
+        for op in ops:
+            if not op.apply():
+                self.reject(op.index, op.action, op.ship.ID, "refused")
+
+    def run(self, operations):
+        self.execute(self.compile_many(operations))
+        return self.rejected
+
+PORT_REPORT_BUCKETS = {
+    BasicContainer: "basic_container",
+    HeavyContainer: "heavy_container",
+    LiquidContainer: "liquid_container"
+}
+SHIP_REPORT_BUCKETS = {**PORT_REPORT_BUCKETS, RefrigeratedContainer: "refrigerated_container"}
+
+def bucketize(containers, buckets):
+    result = {name: [] for name in buckets.values()}
+    for container in containers:
+        for kind in containerKinds(type(container)):
+            name = buckets.get(kind)
+            if name is not None:
+                result[name].append(container.ID)
+    return result
+
+class ReportWriter:
+    def __init__(self, file, pretty=True):
+        self.file = file
+        self.pretty = pretty
+        self.count = 0
+
+    def port_data(self, port):
+        port_data = {"lat": port.latitude, "lon": port.longitude, **bucketize(port.containers, PORT_REPORT_BUCKETS), "ship_0": {}}
+        for ship in port.current:
+            port_data[f"ship_{ship.ID}"] = {"fuel_left": round(ship.fuel, 2), **bucketize(ship.containers, SHIP_REPORT_BUCKETS)}
+        return port_data
+
+    def write_port(self, port):
+        key = json.dumps(f"Port {port.ID}")
+        port_data = self.port_data(port)
+        if self.pretty:
+            body = json.dumps(port_data, indent=4).replace("\n", "\n    ")
+            self.file.write(("{\n    " if self.count == 0 else ",\n    ") + key + ": " + body)
+        else:
+            if orjson is not None:
+                body = orjson.dumps(port_data).decode()
+            else:
+                body = json.dumps(port_data, separators=(",", ":"))
+            self.file.write(("{" if self.count == 0 else ",") + key + ":" + body)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.file.write("{}")
+        else:
+            self.file.write("\n}" if self.pretty else "}")
+
+def write_report(ports, path, pretty=True):
+    with open(path, "w") as file:
+        writer = ReportWriter(file, pretty)
+        for port in ports:
+            writer.write_port(port)
+        writer.close()
+
 def main():
 
     ports = [
@@ -191,46 +572,9 @@ def main():
         {"action": "refuel", "shipID": 2, "amount": 400}
     ]
 
-    for operation in operations:
-        if operation["action"] == "load":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            container = ContainerFactory.create_container(operation["type"], operation["containerID"], operation["weight"])
-            ship.load(container)
-        elif operation["action"] == "unload":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            container = next(c for c in ship.containers if c.ID == operation["containerID"])
-            ship.unLoad(container)
-        elif operation["action"] == "sail":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            destination_port = next(p for p in ports if p.ID == operation["portID"])
-            ship.sailTo(destination_port)
-        elif operation["action"] == "refuel":
-            ship = next(s for s in ships if s.ID == operation["shipID"])
-            ship.reFuel(operation["amount"])
-
-    output_data = {}
-    for port in ports:
-        port_data = {
-            "lat": port.latitude,
-            "lon": port.longitude,
-            "basic_container": [c.ID for c in port.containers if isinstance(c, BasicContainer)],
-            "heavy_container": [c.ID for c in port.containers if isinstance(c, HeavyContainer)],
-            "liquid_container": [c.ID for c in port.containers if isinstance(c, LiquidContainer)],
-            "ship_0": {}
-        }
-        for ship in port.current:
-            ship_data = {
-                "fuel_left": round(ship.fuel, 2),
-                "basic_container": [c.ID for c in ship.containers if isinstance(c, BasicContainer)],
-                "heavy_container": [c.ID for c in ship.containers if isinstance(c, HeavyContainer)],
-                "liquid_container": [c.ID for c in ship.containers if isinstance(c, LiquidContainer)],
-                "refrigerated_container": [c.ID for c in ship.containers if isinstance(c, RefrigeratedContainer)]
-            }
-            port_data[f"ship_{ship.ID}"] = ship_data
-        output_data[f"Port {port.ID}"] = port_data
-
-    with open("D:\output1.json", "w") as file:
-        json.dump(output_data, file, indent=4)
+    OperationDispatcher(Fleet(ships), PortRegistry(ports)).run(operations)
+
+    write_report(ports, "D:\output1.json")
 
 if __name__ == "__main__":
     main()
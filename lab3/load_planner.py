@@ -0,0 +1,170 @@
+import math
+import sys
+import time
+from lab3 import containerKinds
+
+EPSILON = 1e-9
+
+
+class ShipSlot:
+    __slots__ = ("ship", "count", "weight", "typeCounts", "containers")
+
+    def __init__(self, ship):
+        self.ship = ship
+        self.count = len(ship.containers)
+        self.weight = ship.totalWeight
+        self.typeCounts = dict(ship.typeCounts)
+        self.containers = []
+
+    def fits(self, container):
+        ship = self.ship
+        if self.count >= ship.maxAllContainers:
+            return False
+        if self.weight + container.weight > ship.totalWeightCapacity:
+            return False
+        for kind in containerKinds(type(container)):
+            limit = ship.typeLimits.get(kind)
+            if limit is not None and self.typeCounts.get(kind, 0) >= getattr(ship, limit):
+                return False
+        return True
+
+    def add(self, container):
+        self.count += 1
+        self.weight += container.weight
+        for kind in containerKinds(type(container)):
+            self.typeCounts[kind] = self.typeCounts.get(kind, 0) + 1
+        self.containers.append(container)
+
+    def remove(self, container):
+        self.count -= 1
+        self.weight -= container.weight
+        for kind in containerKinds(type(container)):
+            self.typeCounts[kind] -= 1
+        self.containers.pop()
+
+    def remaining_weight(self):
+        return max(self.ship.totalWeightCapacity - self.weight, 0)
+
+    def signature(self):
+        ship = self.ship
+        return (ship.totalWeightCapacity, ship.maxAllContainers, ship.maxHeavyContainers,
+                ship.maxRefrigeratedContainers, ship.maxLiquidContainers, ship.fuelConsumptionPerKM)
+
+
+class LoadPlan:
+    def __init__(self, assignments, unassigned, optimal=False):
+        self.assignments = assignments
+        self.unassigned = unassigned
+        self.optimal = optimal
+        self.loadedWeight = sum(c.weight for containers in assignments.values() for c in containers)
+        self.fuelCost = sum(ship.fuelConsumptionPerKM for ship, containers in assignments.items()
+                            if containers or ship.containers)
+
+    @property
+    def fuelPerTonne(self):
+        return self.fuelCost / self.loadedWeight if self.loadedWeight else math.inf
+
+    def apply(self):
+        loaded = []
+        for ship, containers in self.assignments.items():
+            loaded.extend(ship.load_many(containers))
+        return loaded
+
+
+class LoadPlanner:
+    # Мета: максимальна вага вантажу, далі мінімальна витрата палива кораблів на км
+    def __init__(self, ships):
+        self.ships = sorted(ships, key=lambda ship: ship.fuelConsumptionPerKM / ship.totalWeightCapacity
+                            if ship.totalWeightCapacity else math.inf)
+
+    @classmethod
+    def for_port(cls, port):
+        return cls(port.current)
+
+    def _plan(self, slots, order, assignment, optimal=False):
+        assignments = {slot.ship: [] for slot in slots}
+        unassigned = []
+        for container, slot in zip(order, assignment):
+            if slot is None:
+                unassigned.append(container)
+            else:
+                assignments[slot.ship].append(container)
+        return LoadPlan(assignments, unassigned, optimal)
+
+    def greedy(self, containers):
+        order = sorted(containers, key=lambda c: c.weight, reverse=True)
+        slots = [ShipSlot(ship) for ship in self.ships]
+        assignment = []
+        for container in order:
+            chosen = None
+            for slot in slots:
+                if slot.count and slot.fits(container):
+                    chosen = slot
+                    break
+            if chosen is None:
+                for slot in slots:
+                    if not slot.count and slot.fits(container):
+                        chosen = slot
+                        break
+            if chosen is not None:
+                chosen.add(container)
+            assignment.append(chosen)
+        return self._plan(slots, order, assignment)
+
+    def branch_and_bound(self, containers, timeBudget=1.0):
+        order = sorted(containers, key=lambda c: c.weight, reverse=True)
+        if len(order) > sys.getrecursionlimit() - 100:
+            raise ValueError("Batch is too large for the exact mode, use greedy()")
+        slots = [ShipSlot(ship) for ship in self.ships]
+        incumbent = self.greedy(order)
+        slot_of = {slot.ship: slot for slot in slots}
+        placed = {id(c): slot_of[ship] for ship, cs in incumbent.assignments.items() for c in cs}
+        best = {
+            "weight": incumbent.loadedWeight,
+            "cost": incumbent.fuelCost,
+            "assignment": [placed.get(id(c)) for c in order]
+        }
+        suffix = [0.0] * (len(order) + 1)
+        for i in range(len(order) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + order[i].weight
+        assignment = [None] * len(order)
+        deadline = time.perf_counter() + timeBudget
+        nodes = 0
+
+        def search(i, loaded, cost):
+            nonlocal nodes
+            nodes += 1
+            if nodes % 1024 == 0 and time.perf_counter() > deadline:
+                raise TimeoutError
+            capacity = sum(slot.remaining_weight() for slot in slots)
+            free = sum(max(slot.ship.maxAllContainers - slot.count, 0) for slot in slots)
+            bound = loaded + min(capacity, suffix[i] - suffix[min(i + free, len(order))])
+            if bound < best["weight"] - EPSILON or (bound <= best["weight"] + EPSILON and cost >= best["cost"] - EPSILON):
+                return
+            if i == len(order):
+                best["weight"], best["cost"], best["assignment"] = loaded, cost, list(assignment)
+                return
+            container = order[i]
+            opened = set()
+            for slot in slots:
+                if not slot.fits(container):
+                    continue
+                opening = slot.count == 0
+                if opening:
+                    # Порожні кораблі з однаковими параметрами взаємозамінні
+                    if slot.signature() in opened:
+                        continue
+                    opened.add(slot.signature())
+                slot.add(container)
+                assignment[i] = slot
+                search(i + 1, loaded + container.weight, cost + (slot.ship.fuelConsumptionPerKM if opening else 0))
+                slot.remove(container)
+            assignment[i] = None
+            search(i + 1, loaded, cost)
+
+        try:
+            search(0, 0.0, sum(slot.ship.fuelConsumptionPerKM for slot in slots if slot.count))
+            optimal = True
+        except TimeoutError:
+            optimal = False
+        return self._plan(slots, order, best["assignment"], optimal)
@@ -0,0 +1,184 @@
+import os
+import struct
+import zlib
+from lab3 import ContainerFactory, Fleet, PortRegistry, OperationDispatcher
+from snapshot import write_snapshot, read_snapshot
+
+MAGIC = b"PLOG"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<BBqqdI")
+BODY = struct.Struct("<BBqqd")
+ACTIONS = ("load", "unload", "sail", "refuel")
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+INTEGER_VALUE = 0x80
+
+
+def _header(kinds):
+    table = b"".join(struct.pack("<H", len(name.encode())) + name.encode() for name in kinds)
+    return HEADER.pack(MAGIC, VERSION, len(kinds)) + table
+
+
+def _read_header(file):
+    data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Operation log header is truncated")
+    magic, version, count = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("Not an operation log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported operation log version {version}")
+    kinds = []
+    for _ in range(count):
+        (length,) = struct.unpack("<H", file.read(2))
+        kinds.append(file.read(length).decode())
+    return kinds, file.tell()
+
+
+def _records(file, kinds):
+    # Обірваний останній запис (збій посеред запису) просто ігнорується
+    while True:
+        data = file.read(RECORD.size)
+        if len(data) < RECORD.size:
+            return
+        body, checksum = data[:BODY.size], RECORD.unpack(data)[-1]
+        if zlib.crc32(body) != checksum:
+            return
+        code, kind, shipID, ref, value = BODY.unpack(body)
+        action = ACTIONS[code & ~INTEGER_VALUE]
+        if code & INTEGER_VALUE:
+            value = int(value)
+        if action == "load":
+            yield {"action": action, "shipID": shipID, "type": kinds[kind], "containerID": ref, "weight": value}
+        elif action == "unload":
+            yield {"action": action, "shipID": shipID, "containerID": ref}
+        elif action == "sail":
+            yield {"action": action, "shipID": shipID, "portID": ref}
+        else:
+            yield {"action": action, "shipID": shipID, "amount": value}
+
+
+def read_log(path, start=0):
+    with open(path, "rb") as file:
+        kinds, offset = _read_header(file)
+        file.seek(offset + start * RECORD.size)
+        yield from _records(file, kinds)
+
+
+class OperationLog:
+    def __init__(self, path, syncEvery=1000):
+        self.path = path
+        self.syncEvery = syncEvery
+        self.pending = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                self.kinds, self.offset = _read_header(file)
+                self.sequence = sum(1 for _ in _records(file, self.kinds))
+            self.file = open(path, "r+b")
+            self.file.truncate(self.offset + self.sequence * RECORD.size)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.kinds = list(ContainerFactory.registry)
+            header = _header(self.kinds)
+            self.offset = len(header)
+            self.sequence = 0
+            self.file = open(path, "wb")
+            self.file.write(header)
+            self.sync()
+        self.kindCodes = {name: code for code, name in enumerate(self.kinds)}
+
+    def encode(self, operation):
+        action = operation["action"]
+        kind, ref, value = 0, 0, 0.0
+        if action == "load":
+            kind, ref, value = self.kindCodes[operation["type"]], operation["containerID"], operation["weight"]
+        elif action == "unload":
+            ref = operation["containerID"]
+        elif action == "sail":
+            ref = operation["portID"]
+        elif action == "refuel":
+            value = operation["amount"]
+        else:
+            raise ValueError(f"Unknown action {action!r}")
+        code = ACTION_CODES[action] | (INTEGER_VALUE if isinstance(value, int) else 0)
+        body = BODY.pack(code, kind, operation["shipID"], ref, value)
+        return body + struct.pack("<I", zlib.crc32(body))
+
+    def append(self, operation):
+        self.write(self.encode(operation))
+
+    def write(self, record):
+        self.file.write(record)
+        self.sequence += 1
+        self.pending += 1
+        if self.pending >= self.syncEvery:
+            self.sync()
+
+    def append_many(self, operations):
+        for operation in operations:
+            self.append(operation)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JournaledDispatcher:
+    # Операція спершу потрапляє в журнал, потім застосовується; знімок стану фіксує номер останньої операції
+    def __init__(self, ports, ships, log, snapshotPath, checkpointEvery=10000):
+        self.ports = list(ports)
+        self.ships = list(ships)
+        self.log = log
+        self.snapshotPath = snapshotPath
+        self.checkpointEvery = checkpointEvery
+        self.dispatcher = OperationDispatcher(Fleet(self.ships), PortRegistry(self.ports))
+        self.checkpoint()
+
+    def dispatch(self, operation):
+        # У журнал потрапляють лише операції, що пройшли перевірку й мають двійкове представлення
+        dispatcher = self.dispatcher
+        reason = dispatcher.validate(operation)
+        if reason is None:
+            try:
+                record = self.log.encode(operation)
+            except KeyError:
+                reason = f"container type {operation['type']!r} is not in the log header"
+            except (struct.error, TypeError):
+                reason = "operation cannot be encoded in the log"
+        if reason is not None:
+            dispatcher.reject(dispatcher.count, operation.get("action"), operation.get("shipID"), reason)
+            dispatcher.count += 1
+            return False
+        self.log.write(record)
+        result = dispatcher.dispatch(operation)
+        if self.checkpointEvery and self.log.sequence % self.checkpointEvery == 0:
+            self.checkpoint()
+        return result
+
+    def run(self, operations):
+        for operation in operations:
+            self.dispatch(operation)
+
+    def checkpoint(self):
+        self.log.sync()
+        write_snapshot(self.snapshotPath, self.ports, self.ships, sequence=self.log.sequence)
+
+
+def recover(snapshotPath, logPath):
+    ports, ships, sequence = read_snapshot(snapshotPath)
+    dispatcher = OperationDispatcher(Fleet(ships), PortRegistry(ports))
+    tail = list(read_log(logPath, sequence))
+    dispatcher.run(tail)
+    return ports, ships, sequence + len(tail)
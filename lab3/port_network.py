@@ -0,0 +1,95 @@
+import math
+from array import array
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def planar_distance(lat1, lon1, lat2, lon2):
+    return math.sqrt((lat1 - lat2)**2 + (lon1 - lon2)**2)
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+METRICS = {"planar": planar_distance, "haversine": haversine_distance}
+
+
+class PortNetwork:
+    # metric задає відстані для відображення та пошуку найближчих портів; паливо Ship.sailTo
+    # рахує за плоскою метрикою, тому досяжність і маршрути завжди використовують fuelMatrix
+    def __init__(self, ports=(), metric="planar"):
+        if metric not in METRICS:
+            raise ValueError("Unknown distance metric")
+        self.metric = metric
+        self.distanceFunction = METRICS[metric]
+        self.ports = []
+        self.index = {}
+        self.matrix = []
+        self.fuelMatrix = self.matrix if metric == "planar" else []
+        self.version = 0
+        for port in ports:
+            self.add_port(port)
+
+    def add_port(self, port):
+        if port.ID in self.index:
+            raise ValueError(f"Port {port.ID} is already in the network")
+        distance = self.distanceFunction
+        row = array('d', [distance(port.latitude, port.longitude, other.latitude, other.longitude)
+                          for other in self.ports])
+        for other_row, value in zip(self.matrix, row):
+            other_row.append(value)
+        row.append(0.0)
+        if self.fuelMatrix is not self.matrix:
+            fuel_row = array('d', [planar_distance(port.latitude, port.longitude, other.latitude, other.longitude)
+                                   for other in self.ports])
+            for other_row, value in zip(self.fuelMatrix, fuel_row):
+                other_row.append(value)
+            fuel_row.append(0.0)
+            self.fuelMatrix.append(fuel_row)
+        self.index[port.ID] = len(self.ports)
+        self.ports.append(port)
+        self.matrix.append(row)
+        self.version += 1
+        return port
+
+    def __len__(self):
+        return len(self.ports)
+
+    def distance(self, port, other):
+        return self.matrix[self.index[port.ID]][self.index[other.ID]]
+
+    def distances_from(self, port):
+        return self.matrix[self.index[port.ID]]
+
+    def nearest_port(self, latitude, longitude):
+        distance = self.distanceFunction
+        return min(self.ports, key=lambda port: distance(latitude, longitude, port.latitude, port.longitude),
+                   default=None)
+
+    def nearest_ports(self, positions):
+        return [self.nearest_port(latitude, longitude) for latitude, longitude in positions]
+
+    def nearest_other_port(self, port):
+        own = self.index[port.ID]
+        row = self.matrix[own]
+        best = min((i for i in range(len(row)) if i != own), key=row.__getitem__, default=None)
+        return None if best is None else self.ports[best]
+
+    def reachable_ports(self, ship):
+        # Паливо, що лишається на відстань після витрат на вантаж
+        if ship.fuel < ship.totalConsumption:
+            return []
+        row = self.fuelMatrix[self.index[ship.currentPort.ID]]
+        if ship.fuelConsumptionPerKM <= 0:
+            return [port for port in self.ports if port is not ship.currentPort]
+        max_distance = (ship.fuel - ship.totalConsumption) / ship.fuelConsumptionPerKM
+        return [self.ports[i] for i, value in enumerate(row)
+                if value <= max_distance and self.ports[i] is not ship.currentPort]
+
+    def reachable_ports_for_fleet(self, ships):
+        return {ship.ID: self.reachable_ports(ship) for ship in ships}
@@ -0,0 +1,123 @@
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+
+class Route:
+    def __init__(self, ports, legFuel, refuels):
+        self.ports = ports
+        self.legFuel = legFuel
+        self.refuels = refuels
+
+    @property
+    def hops(self):
+        return len(self.ports) - 1
+
+    @property
+    def totalFuel(self):
+        return sum(self.legFuel)
+
+
+class RoutePlanner:
+    def __init__(self, network):
+        self.network = network
+        self.neighborCache = {}
+        self.cacheVersion = network.version
+
+    def neighbors(self, node, max_distance):
+        # Сусіди відсортовані за відстанню, тож для будь-якого запасу ходу це префікс
+        if self.cacheVersion != self.network.version:
+            self.neighborCache.clear()
+            self.cacheVersion = self.network.version
+        entry = self.neighborCache.get(node)
+        if entry is None:
+            row = self.network.fuelMatrix[node]
+            order = sorted(range(len(row)), key=row.__getitem__)
+            entry = self.neighborCache[node] = (array('d', [row[i] for i in order]), array('l', order))
+        distances, order = entry
+        count = bisect_right(distances, max_distance)
+        return zip(order[:count], distances[:count])
+
+    def plan(self, ship, destination, mode="fuel", tankCapacity=None):
+        network = self.network
+        tank = ship.fuel if tankCapacity is None else tankCapacity
+        cargo = ship.totalConsumption
+        per_km = ship.fuelConsumptionPerKM
+        start = network.index[ship.currentPort.ID]
+        goal = network.index[destination.ID]
+        if start == goal:
+            return Route([ship.currentPort], [], [])
+        if tank < cargo:
+            return None
+        max_distance = (tank - cargo) / per_km if per_km > 0 else math.inf
+        if mode == "fuel":
+            previous = self._cheapest(start, goal, max_distance, per_km, cargo)
+        elif mode == "hops":
+            previous = self._fewest_hops(start, goal, max_distance)
+        else:
+            raise ValueError("Unknown route mode")
+        if previous is None:
+            return None
+
+        path = [goal]
+        while path[-1] != start:
+            path.append(previous[path[-1]])
+        path.reverse()
+        ports = [network.ports[i] for i in path]
+        leg_fuel = [per_km * network.fuelMatrix[a][b] + cargo for a, b in zip(path, path[1:])]
+
+        fuel = ship.fuel
+        refuels = []
+        for port, need in zip(ports, leg_fuel):
+            if fuel < need:
+                refuels.append((port, need - fuel))
+                fuel = need
+            fuel -= need
+        return Route(ports, leg_fuel, refuels)
+
+    def _cheapest(self, start, goal, max_distance, per_km, cargo):
+        goal_row = self.network.fuelMatrix[goal]
+        best = {start: 0.0}
+        previous = {start: None}
+        heap = [(per_km * goal_row[start] + cargo, 0.0, start)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == goal:
+                return previous
+            if cost > best[node]:
+                continue
+            for neighbor, distance in self.neighbors(node, max_distance):
+                if neighbor == node:
+                    continue
+                new_cost = cost + per_km * distance + cargo
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    previous[neighbor] = node
+                    estimate = 0.0 if neighbor == goal else per_km * goal_row[neighbor] + cargo
+                    heapq.heappush(heap, (new_cost + estimate, new_cost, neighbor))
+        return None
+
+    def _fewest_hops(self, start, goal, max_distance):
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbor, _ in self.neighbors(node, max_distance):
+                if neighbor not in previous:
+                    previous[neighbor] = node
+                    if neighbor == goal:
+                        return previous
+                    queue.append(neighbor)
+        return None
+
+    @staticmethod
+    def follow(ship, route):
+        for port in route.ports[1:]:
+            need = ship.tripConsumption(port)
+            while ship.fuel < need:
+                ship.reFuel(need - ship.fuel)
+            if not ship.sailTo(port):
+                return False
+        return True
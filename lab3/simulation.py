@@ -0,0 +1,116 @@
+import heapq
+from collections import deque
+
+
+class Simulation:
+    # Дискретно-подієва модель: рейси тривають distance / speed, порти мають обмежену кількість причалів
+    def __init__(self, ports, ships, speed=1.0, berths=None, defaultBerths=None):
+        self.ports = list(ports)
+        self.ships = list(ships)
+        self.speed = speed
+        self.now = 0.0
+        self.queue = []
+        self.sequence = 0
+        self.berths = {port.ID: defaultBerths for port in self.ports}
+        self.berths.update(berths or {})
+        self.waiting = {port.ID: deque() for port in self.ports}
+        self.inTransit = {}
+        self.pending = {}
+        self.failedSails = []
+        self.completedVoyages = 0
+        self.samples = []
+        # Вибірки самі себе перепланують, тому окремо рахуються лише інші події в черзі
+        self.scheduled = 0
+        self._sampleAction = self._sample
+
+    def schedule(self, time, action, *args):
+        if time < self.now:
+            raise ValueError("Cannot schedule an event in the past")
+        heapq.heappush(self.queue, (time, self.sequence, action, args))
+        self.sequence += 1
+        if action is not self._sampleAction:
+            self.scheduled += 1
+
+    def schedule_load(self, time, ship, container):
+        self.schedule(time, self._at_berth, ship, ship.load, container)
+
+    def schedule_unload(self, time, ship, container):
+        self.schedule(time, self._at_berth, ship, ship.unLoad, container)
+
+    def schedule_refuel(self, time, ship, amount):
+        self.schedule(time, self._at_berth, ship, ship.reFuel, amount)
+
+    def schedule_sail(self, time, ship, port):
+        self.schedule(time, self._at_berth, ship, self._depart, ship, port)
+
+    def sample_every(self, interval, hook=None, until=None):
+        self.schedule(self.now, self._sampleAction, interval, hook or self.record_occupancy, until)
+
+    def record_occupancy(self, simulation):
+        self.samples.append((self.now, {port.ID: len(port.current) for port in self.ports}))
+
+    def has_free_berth(self, port):
+        capacity = self.berths.get(port.ID)
+        return capacity is None or len(port.current) < capacity
+
+    def run(self, until=None):
+        queue = self.queue
+        sample = self._sampleAction
+        while queue and (until is None or queue[0][0] <= until):
+            time, _, action, args = heapq.heappop(queue)
+            self.now = time
+            if action is not sample:
+                self.scheduled -= 1
+            action(*args)
+        if until is not None:
+            self.now = max(self.now, until)
+        return self.now
+
+    def _at_berth(self, ship, operation, *args):
+        # Операції з кораблем у морі чекають на його прибуття
+        if ship.ID in self.inTransit:
+            self.pending.setdefault(ship.ID, deque()).append((operation, args))
+        else:
+            operation(*args)
+
+    def _depart(self, ship, port):
+        consumption = ship.tripConsumption(port)
+        if ship.fuel < consumption:
+            self.failedSails.append((self.now, ship.ID, port.ID))
+            return
+        origin = ship.currentPort
+        ship.fuel -= consumption
+        origin.outgoingShip(ship)
+        self.inTransit[ship.ID] = port
+        self.schedule(self.now + origin.getDistance(port) / self.speed, self._arrive, ship, port)
+        self._release_berth(origin)
+
+    def _arrive(self, ship, port):
+        if self.has_free_berth(port):
+            self._dock(ship, port)
+        else:
+            self.waiting[port.ID].append(ship)
+
+    def _dock(self, ship, port):
+        del self.inTransit[ship.ID]
+        port.incomingShip(ship)
+        ship.currentPort = port
+        self.completedVoyages += 1
+        pending = self.pending.pop(ship.ID, ())
+        while pending:
+            operation, args = pending.popleft()
+            operation(*args)
+            if ship.ID in self.inTransit:
+                self.pending[ship.ID] = pending
+                break
+
+    def _release_berth(self, port):
+        waiting = self.waiting[port.ID]
+        while waiting and self.has_free_berth(port):
+            self._dock(waiting.popleft(), port)
+
+    def _sample(self, interval, hook, until):
+        hook(self)
+        next_time = self.now + interval
+        if (until is None and self.scheduled) or (until is not None and next_time <= until):
+            self.schedule(next_time, self._sampleAction, interval, hook, until)
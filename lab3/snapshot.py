@@ -0,0 +1,215 @@
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+from lab3 import Port, Ship, ContainerFactory
+
+MAGIC = b"PLSNAP"
+VERSION = 2
+EXACT_DOUBLE = 2**53
+HEADER = struct.Struct("<6sHQQQQI")
+
+
+def _align(buffer):
+    buffer.extend(bytes(-len(buffer) % 8))
+
+
+def _column(buffer, code, values):
+    buffer.extend(array(code, values).tobytes())
+    _align(buffer)
+
+
+def _numbers(buffer, values):
+    # Цілі стовпці зберігаються як int64; змішані - як double з ознакою цілого, тож int там мусить бути точним
+    if all(isinstance(value, int) for value in values):
+        _column(buffer, 'B', [1])
+        _column(buffer, 'q', values)
+        return
+    for value in values:
+        if isinstance(value, int) and abs(value) > EXACT_DOUBLE:
+            raise ValueError(f"Integer {value} cannot be stored exactly next to floats")
+    _column(buffer, 'B', [0])
+    _column(buffer, 'd', values)
+    _column(buffer, 'B', [isinstance(value, int) for value in values])
+
+
+def _ids(values):
+    for value in values:
+        if not isinstance(value, int):
+            raise ValueError("Snapshots support integer IDs only")
+    return values
+
+
+def _type_names():
+    return {kind: name for name, kind in ContainerFactory.registry.items()}
+
+
+def _type_name(names, container):
+    for kind in type(container).__mro__:
+        if kind in names:
+            return names[kind]
+    raise ValueError(f"Container type {type(container).__name__} is not registered in ContainerFactory")
+
+
+def write_snapshot(path, ports, ships, sequence=0):
+    ports = list(ports)
+    ships = list(ships)
+    port_index = {id(port): i for i, port in enumerate(ports)}
+    ship_index = {id(ship): i for i, ship in enumerate(ships)}
+    names = _type_names()
+    kinds = []
+    kind_codes = {}
+    owners, container_ids, weights, codes = [], [], [], []
+    for owner, containers in [(-(i + 1), port.containers) for i, port in enumerate(ports)] + \
+                             [(i, ship.containers) for i, ship in enumerate(ships)]:
+        for container in containers:
+            name = _type_name(names, container)
+            if name not in kind_codes:
+                kind_codes[name] = len(kinds)
+                kinds.append(name)
+            owners.append(owner)
+            container_ids.append(container.ID)
+            weights.append(container.weight)
+            codes.append(kind_codes[name])
+
+    buffer = bytearray(HEADER.pack(MAGIC, VERSION, sequence, len(ports), len(ships), len(owners), len(kinds)))
+    for name in kinds:
+        encoded = name.encode()
+        buffer.extend(struct.pack("<H", len(encoded)) + encoded)
+    _align(buffer)
+
+    _column(buffer, 'q', _ids([port.ID for port in ports]))
+    _numbers(buffer, [port.latitude for port in ports])
+    _numbers(buffer, [port.longitude for port in ports])
+    _column(buffer, 'q', [-1 if port.historyLimit is None else port.historyLimit for port in ports])
+    _column(buffer, 'd', [math.nan if port.historyWindow is None else port.historyWindow for port in ports])
+    _column(buffer, 'q', [len(port.current) for port in ports])
+    _column(buffer, 'q', [ship_index[id(ship)] for port in ports for ship in port.current])
+    _column(buffer, 'q', [len(port.history) for port in ports])
+    _column(buffer, 'q', [ship_index[id(ship)] for port in ports for ship in port.history])
+    # Час відплиття - показник годинника порту, тож зберігається вік запису на момент знімка
+    ages = []
+    for port in ports:
+        now = port.clock()
+        ages.extend(math.nan if departed is None else now - departed for departed in port.history.values())
+    _column(buffer, 'd', ages)
+
+    _column(buffer, 'q', _ids([ship.ID for ship in ships]))
+    _numbers(buffer, [ship.fuel for ship in ships])
+    _column(buffer, 'q', [port_index[id(ship.currentPort)] for ship in ships])
+    _numbers(buffer, [ship.totalWeightCapacity for ship in ships])
+    _column(buffer, 'q', [ship.maxAllContainers for ship in ships])
+    _column(buffer, 'q', [ship.maxHeavyContainers for ship in ships])
+    _column(buffer, 'q', [ship.maxRefrigeratedContainers for ship in ships])
+    _column(buffer, 'q', [ship.maxLiquidContainers for ship in ships])
+    _numbers(buffer, [ship.fuelConsumptionPerKM for ship in ships])
+
+    _column(buffer, 'q', owners)
+    _column(buffer, 'q', _ids(container_ids))
+    _numbers(buffer, weights)
+    _column(buffer, 'B', codes)
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(buffer)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class _Reader:
+    def __init__(self, view, offset):
+        self.view = view
+        self.offset = offset
+
+    def column(self, code, count):
+        size = array(code).itemsize * count
+        part = self.view[self.offset:self.offset + size]
+        values = part.cast(code).tolist()
+        part.release()
+        self.offset += size + (-size % 8)
+        return values
+
+    def numbers(self, count):
+        if self.column('B', 1)[0]:
+            return self.column('q', count)
+        values = self.column('d', count)
+        flags = self.column('B', count)
+        return [int(value) if flag else value for value, flag in zip(values, flags)]
+
+
+def _split(counts, values):
+    parts = []
+    start = 0
+    for count in counts:
+        parts.append(values[start:start + count])
+        start += count
+    return parts
+
+
+def read_snapshot(path, clock=time.monotonic):
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            magic, version, sequence, port_count, ship_count, container_count, kind_count = HEADER.unpack_from(view)
+            if magic != MAGIC:
+                raise ValueError("Not a port snapshot")
+            if version != VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}")
+            offset = HEADER.size
+            kinds = []
+            for _ in range(kind_count):
+                (length,) = struct.unpack_from("<H", view, offset)
+                kinds.append(ContainerFactory.kind_of(bytes(view[offset + 2:offset + 2 + length]).decode()))
+                offset += 2 + length
+            reader = _Reader(view, offset + (-offset % 8))
+
+            port_ids = reader.column('q', port_count)
+            latitudes = reader.numbers(port_count)
+            longitudes = reader.numbers(port_count)
+            limits = reader.column('q', port_count)
+            windows = reader.column('d', port_count)
+            current_counts = reader.column('q', port_count)
+            current = _split(current_counts, reader.column('q', sum(current_counts)))
+            history_counts = reader.column('q', port_count)
+            history = _split(history_counts, reader.column('q', sum(history_counts)))
+            ages = _split(history_counts, reader.column('d', sum(history_counts)))
+
+            ship_ids = reader.column('q', ship_count)
+            fuel = reader.numbers(ship_count)
+            ship_ports = reader.column('q', ship_count)
+            capacities = reader.numbers(ship_count)
+            max_all = reader.column('q', ship_count)
+            max_heavy = reader.column('q', ship_count)
+            max_refrigerated = reader.column('q', ship_count)
+            max_liquid = reader.column('q', ship_count)
+            consumption = reader.numbers(ship_count)
+
+            owners = reader.column('q', container_count)
+            container_ids = reader.column('q', container_count)
+            weights = reader.numbers(container_count)
+            codes = reader.column('B', container_count)
+        finally:
+            view.release()
+
+    ports = [Port(ID, latitude, longitude, None if limit < 0 else limit, None if math.isnan(window) else window,
+                  clock)
+             for ID, latitude, longitude, limit, window in zip(port_ids, latitudes, longitudes, limits, windows)]
+    ships = [Ship(*fields) for fields in zip(ship_ids, fuel, [ports[i] for i in ship_ports], capacities, max_all,
+                                             max_heavy, max_refrigerated, max_liquid, consumption)]
+    for port, indexes, port_ages in zip(ports, history, ages):
+        now = port.clock()
+        for i, age in zip(indexes, port_ages):
+            port.history[ships[i]] = None if math.isnan(age) else now - age
+    for port, indexes in zip(ports, current):
+        for i in indexes:
+            port.incomingShip(ships[i])
+    for owner, ID, weight, code in zip(owners, container_ids, weights, codes):
+        container = kinds[code](ID, weight)
+        if owner < 0:
+            ports[-owner - 1].containers.append(container)
+        elif not ships[owner].load(container):
+            raise ValueError(f"Container {ID} does not fit on ship {ships[owner].ID}")
+    return ports, ships, sequence
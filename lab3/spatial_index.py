@@ -0,0 +1,129 @@
+import heapq
+import math
+
+
+class SpatialIndex:
+    def __init__(self, ports=(), cellSize=1.0):
+        self.cellSize = cellSize
+        self.cells = {}
+        self.portCells = {}
+        self.bounds = None
+        for port in ports:
+            self.insert(port)
+
+    def cell_of(self, latitude, longitude):
+        return math.floor(latitude / self.cellSize), math.floor(longitude / self.cellSize)
+
+    def insert(self, port):
+        if port.ID in self.portCells:
+            self.remove(port)
+        cell = self.cell_of(port.latitude, port.longitude)
+        self.cells.setdefault(cell, {})[port.ID] = port
+        self.portCells[port.ID] = cell
+        if self.bounds is None:
+            self.bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            self.bounds = [min(self.bounds[0], cell[0]), min(self.bounds[1], cell[1]),
+                           max(self.bounds[2], cell[0]), max(self.bounds[3], cell[1])]
+
+    def remove(self, port):
+        cell = self.portCells.pop(port.ID)
+        bucket = self.cells[cell]
+        del bucket[port.ID]
+        if not bucket:
+            del self.cells[cell]
+
+    def __len__(self):
+        return len(self.portCells)
+
+    def __contains__(self, port):
+        return port.ID in self.portCells
+
+    def _cells_in_range(self, low, high):
+        if self.bounds is None:
+            return
+        # Діапазон обрізається межами зайнятих клітинок; якщо він все одно більший, переглядаються зайняті
+        min_row, min_column, max_row, max_column = self.bounds
+        low_row, low_column = max(low[0], min_row), max(low[1], min_column)
+        high_row, high_column = min(high[0], max_row), min(high[1], max_column)
+        if low_row > high_row or low_column > high_column:
+            return
+        if (high_row - low_row + 1) * (high_column - low_column + 1) > len(self.cells):
+            for (row, column), bucket in self.cells.items():
+                if low_row <= row <= high_row and low_column <= column <= high_column:
+                    yield from bucket.values()
+            return
+        for row in range(low_row, high_row + 1):
+            for column in range(low_column, high_column + 1):
+                bucket = self.cells.get((row, column))
+                if bucket:
+                    yield from bucket.values()
+
+    def bounding_box(self, minLatitude, minLongitude, maxLatitude, maxLongitude):
+        return [port for port in self._cells_in_range(self.cell_of(minLatitude, minLongitude),
+                                                      self.cell_of(maxLatitude, maxLongitude))
+                if minLatitude <= port.latitude <= maxLatitude and minLongitude <= port.longitude <= maxLongitude]
+
+    def within_radius(self, latitude, longitude, radius):
+        low = self.cell_of(latitude - radius, longitude - radius)
+        high = self.cell_of(latitude + radius, longitude + radius)
+        found = []
+        for port in self._cells_in_range(low, high):
+            distance = math.sqrt((port.latitude - latitude)**2 + (port.longitude - longitude)**2)
+            if distance <= radius:
+                found.append((distance, port))
+        found.sort(key=lambda item: item[0])
+        return [port for _, port in found]
+
+    def _ring(self, center, radius):
+        # Лише ті клітинки кільця, що лежать у межах зайнятої області
+        row, column = center
+        min_row, min_column, max_row, max_column = self.bounds
+        first, last = max(column - radius, min_column), min(column + radius, max_column)
+        for edge in sorted({row - radius, row + radius}):
+            if min_row <= edge <= max_row:
+                for offset in range(first, last + 1):
+                    yield edge, offset
+        first, last = max(row - radius + 1, min_row), min(row + radius - 1, max_row)
+        for edge in sorted({column - radius, column + radius}):
+            if min_column <= edge <= max_column:
+                for offset in range(first, last + 1):
+                    yield offset, edge
+
+    def _scan(self, latitude, longitude, k):
+        ports = (port for bucket in self.cells.values() for port in bucket.values())
+
+        def distance(port):
+            return math.sqrt((port.latitude - latitude)**2 + (port.longitude - longitude)**2)
+
+        return heapq.nsmallest(k, ports, key=distance)
+
+    def nearest(self, latitude, longitude, k=1):
+        # Кільця клітинок навколо точки; непереглянуті клітинки не ближчі за radius * cellSize
+        if not self.cells or k <= 0:
+            return []
+        center = self.cell_of(latitude, longitude)
+        min_row, min_column, max_row, max_column = self.bounds
+        max_radius = max(abs(center[0] - min_row), abs(center[0] - max_row),
+                         abs(center[1] - min_column), abs(center[1] - max_column))
+        # Кільця ближче за межі зайнятої області порожні, тож пошук починається з першого кільця, що їх торкається
+        start = max(min_row - center[0], center[0] - max_row, min_column - center[1], center[1] - max_column, 0)
+        best = []
+        counter = 0
+        visited = 0
+        for radius in range(start, max_radius + 1):
+            for cell in self._ring(center, radius):
+                visited += 1
+                for port in self.cells.get(cell, {}).values():
+                    distance = math.sqrt((port.latitude - latitude)**2 + (port.longitude - longitude)**2)
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, counter, port))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, counter, port))
+            if len(best) == k and -best[0][0] <= radius * self.cellSize:
+                break
+            if visited > len(self.cells):
+                # Порожніх клітинок переглянуто більше, ніж є зайнятих: дешевше перебрати всі порти
+                return self._scan(latitude, longitude, k)
+        return [port for _, _, port in sorted(best, key=lambda item: -item[0])]
@@ -0,0 +1,127 @@
+import csv
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from lab3 import Fleet, PortRegistry, OperationDispatcher
+from synthetic import make_ports, make_ships, make_operations
+
+DEFAULT_PARAMETERS = {
+    "ports": 5,
+    "ships": 10,
+    "operations": 500,
+    "fuel": 500,
+    "fuelConsumptionPerKM": 1.0,
+    "capacity": 1000,
+    "maxContainers": 10,
+    "refuelAmount": 200
+}
+
+
+def parameter_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def build_scenario(params, rng):
+    params = {**DEFAULT_PARAMETERS, **params}
+    ports = make_ports(params["ports"], rng)
+    ships = make_ships(params["ships"], ports, rng, fuel=params["fuel"],
+                       fuelConsumptionPerKM=params["fuelConsumptionPerKM"], capacity=params["capacity"],
+                       maxContainers=params["maxContainers"])
+    operations = make_operations(params["operations"], ships, ports, rng, refuelAmount=params["refuelAmount"])
+    return ports, ships, operations
+
+
+def run_scenario(params, seed, builder=build_scenario):
+    ports, ships, operations = builder(params, random.Random(seed))
+    dispatcher = OperationDispatcher(Fleet(ships), PortRegistry(ports))
+    dispatcher.run(operations)
+    counts = {"load": [0, 0], "unload": [0, 0], "sail": [0, 0], "refuel": [0, 0]}
+    for operation in operations:
+        counts[operation["action"]][0] += 1
+    for rejection in dispatcher.rejected:
+        counts[rejection["action"]][1] += 1
+    capacity = sum(ship.maxAllContainers for ship in ships)
+    return {
+        **params,
+        "seed": seed,
+        "fuel_left": round(sum(ship.fuel for ship in ships), 2),
+        "sails": counts["sail"][0],
+        "failed_sails": counts["sail"][1],
+        "failed_loads": counts["load"][1],
+        "utilization": round(sum(len(ship.containers) for ship in ships) / capacity, 4) if capacity else 0.0
+    }
+
+
+class SweepRunner:
+    # Кожен сценарій має стабільний ключ і насіння, тож перерваний прогін можна продовжити з контрольної точки
+    def __init__(self, grid, seed=0, repeats=1, builder=build_scenario, checkpoint=None, workers=None):
+        self.grid = grid
+        self.seed = seed
+        self.repeats = repeats
+        self.builder = builder
+        self.checkpoint = checkpoint
+        self.workers = workers or os.cpu_count() or 1
+
+    def scenarios(self):
+        scenarios = []
+        for params in parameter_grid(self.grid):
+            for repeat in range(self.repeats):
+                key = json.dumps({"params": params, "repeat": repeat}, sort_keys=True)
+                seed = random.Random(f"{self.seed}:{key}").getrandbits(32)
+                scenarios.append((key, params, seed))
+        return scenarios
+
+    def completed(self):
+        done = {}
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    done[record["key"]] = record["result"]
+        return done
+
+    def run(self):
+        scenarios = self.scenarios()
+        done = self.completed()
+        remaining = [scenario for scenario in scenarios if scenario[0] not in done]
+        checkpoint = None
+        if self.checkpoint:
+            # Перезапис відкидає недописаний останній рядок після збою; через тимчасовий файл,
+            # щоб збій під час перезапису не втратив уже готових сценаріїв
+            temporary = self.checkpoint + ".tmp"
+            with open(temporary, "w") as file:
+                for key, result in done.items():
+                    file.write(json.dumps({"key": key, "result": result}) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.checkpoint)
+            checkpoint = open(self.checkpoint, "a")
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(run_scenario, params, seed, self.builder): key
+                           for key, params, seed in remaining}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    done[key] = future.result()
+                    if checkpoint:
+                        checkpoint.write(json.dumps({"key": key, "result": done[key]}) + "\n")
+                        checkpoint.flush()
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        return [done[key] for key, _, _ in scenarios]
+
+
+def write_table(results, path):
+    if not results:
+        return
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,47 @@
+from lab3 import Port, ShipBuilder, ContainerFactory
+
+CONTAINER_TYPES = ("basic", "heavy", "refrigerated", "liquid")
+
+
+def make_ports(count, rng, spread=50.0):
+    return [Port(ID=i, latitude=rng.uniform(-spread, spread), longitude=rng.uniform(-spread, spread))
+            for i in range(count)]
+
+
+def make_ships(count, ports, rng, fuel=500, fuelConsumptionPerKM=1.0, capacity=1000, maxContainers=10):
+    ships = []
+    for i in range(count):
+        port = rng.choice(ports)
+        ship = ShipBuilder(ID=i, fuel=fuel, currentPort=port) \
+            .set_total_weight_capacity(capacity) \
+            .set_container_limits(maxContainers, maxContainers // 2, maxContainers // 4, maxContainers // 4) \
+            .set_fuel_consumption(fuelConsumptionPerKM) \
+            .build()
+        port.incomingShip(ship)
+        ships.append(ship)
+    return ships
+
+
+def make_containers(count, rng, weights=(10, 200), firstID=0):
+    return ContainerFactory.create_many([rng.choice(CONTAINER_TYPES) for _ in range(count)],
+                                        range(firstID, firstID + count),
+                                        [rng.randint(*weights) for _ in range(count)])
+
+
+def make_operations(count, ships, ports, rng, weights=(10, 200), refuelAmount=200):
+    operations = []
+    loaded = {ship.ID: [] for ship in ships}
+    for containerID in range(count):
+        ship = rng.choice(ships)
+        roll = rng.random()
+        if roll < 0.4:
+            loaded[ship.ID].append(containerID)
+            operations.append({"action": "load", "shipID": ship.ID, "type": rng.choice(CONTAINER_TYPES),
+                               "containerID": containerID, "weight": rng.randint(*weights)})
+        elif roll < 0.55 and loaded[ship.ID]:
+            operations.append({"action": "unload", "shipID": ship.ID, "containerID": loaded[ship.ID].pop()})
+        elif roll < 0.85:
+            operations.append({"action": "sail", "shipID": ship.ID, "portID": rng.choice(ports).ID})
+        else:
+            operations.append({"action": "refuel", "shipID": ship.ID, "amount": refuelAmount})
+    return operations
@@ -1,6 +1,23 @@
+import io
+import json
+import os
+import random
+import sys
+import tempfile
 import unittest
-from unittest.mock import Mock
-from lab3 import Port, ShipBuilder, ContainerFactory, BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer
+from unittest.mock import Mock, patch
+from port_network import PortNetwork
+from route_planner import RoutePlanner
+from spatial_index import SpatialIndex
+from load_planner import LoadPlanner
+from container_store import ContainerStore
+from simulation import Simulation
+from sweep import SweepRunner, parameter_grid, run_scenario
+from snapshot import write_snapshot, read_snapshot
+from oplog import OperationLog, JournaledDispatcher, read_log, recover
+from synthetic import make_ports, make_ships, make_operations
+from benchmarks import run_suite, compare
+from lab3 import Port, ShipBuilder, ContainerFactory, BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer, Fleet, PortRegistry, OperationDispatcher, ReportWriter
 
 class TestPortManagement(unittest.TestCase):
 
@@ -25,6 +42,16 @@ class TestPortManagement(unittest.TestCase):
         self.assertNotIn(self.ship, self.port1.current)
         self.assertIn(self.ship, self.port1.history)
 
+    def test_port_history_limit(self):
+        port = Port(ID=3, latitude=0, longitude=0, historyLimit=1)
+        other = ShipBuilder(ID=2, fuel=0, currentPort=port).build()
+        for ship in (self.ship, other, self.ship):
+            port.incomingShip(ship)
+            port.outgoingShip(ship)
+
+        self.assertEqual(list(port.history), [self.ship])
+        self.assertEqual(len(port.current), 0)
+
     def test_sailTo(self):
         distance = self.port1.getDistance(self.port2)
         fuel_needed = distance * self.ship.fuelConsumptionPerKM
@@ -53,6 +80,52 @@ class TestPortManagement(unittest.TestCase):
         self.assertTrue(unload_success)
         self.assertNotIn(container1, self.ship.containers)
 
+    def test_duplicate_container_ids(self):
+        first = ContainerFactory.create_container("basic", ID=5, weight=1)
+        second = ContainerFactory.create_container("basic", ID=5, weight=2)
+        self.ship.load(first)
+        self.ship.load(second)
+        self.assertIs(self.ship.findContainer(5), first)
+
+        self.assertTrue(self.ship.unLoad(self.ship.findContainer(5)))
+        self.assertIs(self.ship.findContainer(5), second)
+        self.assertTrue(self.ship.unLoad(self.ship.findContainer(5)))
+        self.assertIsNone(self.ship.findContainer(5))
+        self.assertEqual(self.ship.containers, [])
+
+        self.ship.load(first)
+        self.ship.load(second)
+        self.ship.unLoad(second)
+        self.assertIs(self.ship.findContainer(5), first)
+
+    def test_running_totals(self):
+        basic = ContainerFactory.create_container("basic", ID=101, weight=100)
+        liquid = ContainerFactory.create_container("liquid", ID=102, weight=200)
+        self.ship.load(basic)
+        self.ship.load(liquid)
+
+        self.assertEqual(self.ship.totalWeight, 300)
+        self.assertAlmostEqual(self.ship.totalConsumption, basic.consumption() + liquid.consumption())
+        self.assertEqual(self.ship.containerCount(HeavyContainer), 1)
+        self.assertEqual(self.ship.containerCount(LiquidContainer), 1)
+
+        self.ship.unLoad(liquid)
+        self.assertEqual(self.ship.totalWeight, 100)
+        self.assertEqual(self.ship.containerCount(HeavyContainer), 0)
+        self.assertEqual(self.ship.canReach(self.port2), self.ship.fuel >= self.ship.tripConsumption(self.port2))
+
+    def test_capacity_limits(self):
+        heavy = [ContainerFactory.create_container("heavy", ID=i, weight=50) for i in range(4)]
+        refrigerated = [ContainerFactory.create_container("refrigerated", ID=10 + i, weight=50) for i in range(3)]
+
+        loaded = self.ship.load_many(refrigerated + heavy)
+        self.assertEqual(loaded, refrigerated[:2] + heavy[:3])
+        self.assertEqual(self.ship.containerCount(HeavyContainer), 5)
+
+        too_heavy = ContainerFactory.create_container("basic", ID=20, weight=800)
+        self.assertFalse(self.ship.load(too_heavy))
+        self.assertTrue(self.ship.load(ContainerFactory.create_container("basic", ID=21, weight=750)))
+
     def test_container_factory(self):
         basic_container = ContainerFactory.create_container("basic", ID=1, weight=100)
         heavy_container = ContainerFactory.create_container("heavy", ID=2, weight=200)
@@ -64,6 +137,32 @@ class TestPortManagement(unittest.TestCase):
         self.assertIsInstance(refrigerated_container, RefrigeratedContainer)
         self.assertIsInstance(liquid_container, LiquidContainer)
 
+        with self.assertRaises(ValueError):
+            ContainerFactory.create_container("hazardous", ID=5, weight=10)
+
+    def test_container_factory_registry(self):
+        class HazardousContainer(HeavyContainer):
+            fuelRate = 6.0
+
+            def consumption(self):
+                return self.fuelRate * self.weight
+
+        ContainerFactory.register("hazardous", HazardousContainer)
+        try:
+            containers = ContainerFactory.create_many(["basic", "hazardous"], [1, 2], [10, 20])
+            self.assertIsInstance(containers[0], BasicContainer)
+            self.assertIsInstance(containers[1], HazardousContainer)
+            self.assertEqual(containers[1].consumption(), 120.0)
+
+            store = ContainerStore()
+            store.add(BasicContainer, 1, 10)
+            indexes = ContainerFactory.create_many(["hazardous", "liquid"], [3, 4], [10, 20], store=store)
+            self.assertEqual(indexes, range(1, 3))
+            self.assertIsInstance(store.view(indexes[0]), HazardousContainer)
+            self.assertEqual(len(store), 3)
+        finally:
+            del ContainerFactory.registry["hazardous"]
+
     def test_fuel_consumption(self):
         basic_container = ContainerFactory.create_container("basic", ID=1, weight=100)
         self.ship.load(basic_container)
@@ -76,6 +175,487 @@ class TestPortManagement(unittest.TestCase):
         self.assertTrue(success)
         self.assertAlmostEqual(self.ship.fuel, 0, places=2)
 
+class TestReportWriter(unittest.TestCase):
+
+    def test_single_pass_buckets(self):
+        port = Port(ID=1, latitude=50.45, longitude=30.52)
+        ship = ShipBuilder(ID=1, fuel=500, currentPort=port) \
+            .set_total_weight_capacity(1000) \
+            .set_container_limits(10, 5, 2, 3) \
+            .build()
+        port.incomingShip(ship)
+        ship.load_many([
+            ContainerFactory.create_container("basic", ID=1, weight=10),
+            ContainerFactory.create_container("liquid", ID=2, weight=10),
+            ContainerFactory.create_container("refrigerated", ID=3, weight=10)
+        ])
+
+        for pretty in (True, False):
+            file = io.StringIO()
+            writer = ReportWriter(file, pretty)
+            writer.write_port(port)
+            writer.close()
+            ship_data = json.loads(file.getvalue())["Port 1"]["ship_1"]
+            self.assertEqual(ship_data["basic_container"], [1])
+            self.assertEqual(ship_data["heavy_container"], [2, 3])
+            self.assertEqual(ship_data["liquid_container"], [2])
+            self.assertEqual(ship_data["refrigerated_container"], [3])
+
+        file = io.StringIO()
+        writer = ReportWriter(file)
+        writer.write_port(port)
+        writer.close()
+        self.assertEqual(file.getvalue(), json.dumps({"Port 1": writer.port_data(port)}, indent=4))
+
+class TestContainerStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ContainerStore()
+        indexes = self.store.add_many([BasicContainer, RefrigeratedContainer, LiquidContainer], [1, 2, 3], [100, 50, 80])
+        self.views = [self.store.view(i) for i in indexes]
+
+    def test_views_behave_like_containers(self):
+        basic, refrigerated, liquid = self.views
+        self.assertIsInstance(refrigerated, HeavyContainer)
+        self.assertIsInstance(refrigerated, RefrigeratedContainer)
+        self.assertEqual(liquid.consumption(), LiquidContainer(3, 80).consumption())
+        self.assertEqual(basic, self.store.view(0))
+        self.assertNotEqual(basic, refrigerated)
+        self.assertEqual(self.store.materialize(2).ID, 3)
+
+    def test_views_have_no_dead_slots(self):
+        self.assertEqual(sys.getsizeof(self.views[0]), sys.getsizeof(BasicContainer(1, 100)))
+
+    def test_views_count_towards_type_limits(self):
+        ship = ShipBuilder(ID=5, fuel=0, currentPort=Port(ID=9, latitude=0, longitude=0)) \
+            .set_total_weight_capacity(1000) \
+            .set_container_limits(10, 5, 1, 3) \
+            .build()
+        self.assertTrue(ship.load(self.views[1]))
+        self.assertFalse(ship.load(self.store.add(RefrigeratedContainer, 4, 10)))
+        self.assertEqual(ship.typeCounts[HeavyContainer], 1)
+        self.assertAlmostEqual(ship.totalConsumption, 250.0)
+
+    def test_rejects_kinds_without_fuel_rate(self):
+        class FlatContainer(HeavyContainer):
+            __slots__ = ()
+
+            def consumption(self):
+                return 1.0
+
+        with self.assertRaises(ValueError):
+            self.store.add(FlatContainer, 4, 10)
+        self.assertEqual(len(self.store), 3)
+
+    def test_vectorized_totals(self):
+        expected = sum(view.consumption() for view in self.views)
+        self.assertAlmostEqual(self.store.total_consumption(), expected)
+        self.assertEqual(self.store.total_weight(), 230)
+
+    def test_slotted_containers(self):
+        with self.assertRaises(AttributeError):
+            BasicContainer(1, 10).color = "red"
+
+class TestOperationDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.port1 = Port(ID=1, latitude=50.45, longitude=30.52)
+        self.port2 = Port(ID=2, latitude=52.37, longitude=4.90)
+        self.ship = ShipBuilder(ID=1, fuel=5000, currentPort=self.port1) \
+            .set_total_weight_capacity(1000) \
+            .set_container_limits(10, 5, 2, 3) \
+            .set_fuel_consumption(1.0) \
+            .build()
+        self.port1.incomingShip(self.ship)
+        self.dispatcher = OperationDispatcher(Fleet([self.ship]), PortRegistry([self.port1, self.port2]))
+
+    def test_load_unload_by_id(self):
+        self.dispatcher.dispatch({"action": "load", "shipID": 1, "type": "liquid", "containerID": 7, "weight": 50})
+        container = self.ship.findContainer(7)
+        self.assertIsInstance(container, LiquidContainer)
+
+        self.assertTrue(self.dispatcher.dispatch({"action": "unload", "shipID": 1, "containerID": 7}))
+        self.assertIsNone(self.ship.findContainer(7))
+        self.assertFalse(self.dispatcher.dispatch({"action": "unload", "shipID": 1, "containerID": 7}))
+
+    def test_sail_and_refuel(self):
+        self.dispatcher.run([
+            {"action": "refuel", "shipID": 1, "amount": 100},
+            {"action": "sail", "shipID": 1, "portID": 2}
+        ])
+        self.assertIs(self.ship.currentPort, self.port2)
+        self.assertIn(self.ship, self.port2.current)
+
+    def test_unknown_ship(self):
+        self.assertFalse(self.dispatcher.dispatch({"action": "refuel", "shipID": 99, "amount": 1}))
+        self.assertEqual(self.dispatcher.rejected, [{"index": 0, "action": "refuel", "shipID": 99, "reason": "unknown ship 99"}])
+
+    def test_batch_validation_report(self):
+        rejected = self.dispatcher.run([
+            {"action": "load", "shipID": 1, "type": "heavy", "containerID": 1, "weight": 100},
+            {"action": "load", "shipID": 1, "type": "crate", "containerID": 2, "weight": 100},
+            {"action": "sail", "shipID": 1, "portID": 9},
+            {"action": "dock", "shipID": 1},
+            {"action": "unload", "shipID": 1},
+            {"action": "load", "shipID": 1, "type": "basic", "containerID": 3, "weight": 5000}
+        ])
+        self.assertIsInstance(self.ship.findContainer(1), HeavyContainer)
+        self.assertEqual([(rejection["index"], rejection["reason"]) for rejection in rejected], [
+            (1, "unknown container type 'crate'"),
+            (2, "unknown port 9"),
+            (3, "unknown action 'dock'"),
+            (4, "missing field 'containerID'"),
+            (5, "refused")
+        ])
+
+class TestPortNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.ports = [Port(ID=i, latitude=50.0 + i, longitude=30.0 - 2 * i) for i in range(4)]
+        self.network = PortNetwork(self.ports[:2])
+        for port in self.ports[2:]:
+            self.network.add_port(port)
+
+    def test_matrix_matches_getDistance(self):
+        for port in self.ports:
+            for other in self.ports:
+                self.assertAlmostEqual(self.network.distance(port, other), port.getDistance(other))
+
+    def test_haversine_mode(self):
+        kyiv = Port(ID=1, latitude=50.45, longitude=30.52)
+        amsterdam = Port(ID=2, latitude=52.37, longitude=4.90)
+        network = PortNetwork([kyiv, amsterdam], metric="haversine")
+        self.assertAlmostEqual(network.distance(kyiv, amsterdam), 1790, delta=15)
+
+        ship = ShipBuilder(ID=1, fuel=30, currentPort=kyiv).set_fuel_consumption(1.0).build()
+        self.assertTrue(ship.canReach(amsterdam))
+        self.assertEqual(network.reachable_ports(ship), [amsterdam])
+        network.add_port(Port(ID=3, latitude=10.0, longitude=10.0))
+        self.assertEqual([port.ID for port in network.reachable_ports(ship)], [2])
+        self.assertEqual(len(network.fuelMatrix[0]), 3)
+
+    def test_reachable_ports(self):
+        ship = ShipBuilder(ID=1, fuel=5, currentPort=self.ports[0]).set_fuel_consumption(1.0).build()
+        reachable = self.network.reachable_ports(ship)
+        self.assertEqual([port.ID for port in reachable], [1, 2])
+        self.assertIs(self.network.nearest_port(51.1, 27.9), self.ports[1])
+
+class TestRoutePlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.ports = [Port(ID=i, latitude=0.0, longitude=float(i)) for i in range(6)]
+        self.planner = RoutePlanner(PortNetwork(self.ports))
+        self.ship = ShipBuilder(ID=1, fuel=2.5, currentPort=self.ports[0]) \
+            .set_total_weight_capacity(100) \
+            .set_container_limits(5, 5, 5, 5) \
+            .set_fuel_consumption(1.0) \
+            .build()
+        self.ports[0].incomingShip(self.ship)
+
+    def test_route_with_refuel_stops(self):
+        route = self.planner.plan(self.ship, self.ports[5])
+        self.assertEqual(route.hops, 3)
+        self.assertAlmostEqual(route.totalFuel, 5.0)
+        self.assertAlmostEqual(sum(amount for _, amount in route.refuels), 2.5)
+
+        self.assertTrue(RoutePlanner.follow(self.ship, route))
+        self.assertIs(self.ship.currentPort, self.ports[5])
+
+    def test_unreachable(self):
+        self.assertIsNone(self.planner.plan(self.ship, self.ports[5], mode="hops", tankCapacity=0.5))
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.ports = [Port(ID=i, latitude=float(i % 10), longitude=float(i // 10)) for i in range(100)]
+        self.index = SpatialIndex(self.ports, cellSize=3.0)
+
+    def test_nearest_matches_scan(self):
+        origin = Port(ID=-1, latitude=4.2, longitude=6.9)
+        expected = sorted(self.ports, key=origin.getDistance)[:4]
+        self.assertEqual(self.index.nearest(4.2, 6.9, k=4), expected)
+
+    def test_radius_and_bounding_box(self):
+        self.assertEqual({p.ID for p in self.index.within_radius(0.0, 0.0, 1.0)}, {0, 1, 10})
+        self.assertEqual({p.ID for p in self.index.bounding_box(1.0, 1.0, 2.0, 2.0)}, {11, 12, 21, 22})
+
+    def test_remove(self):
+        self.index.remove(self.ports[0])
+        self.assertNotIn(self.ports[0], self.index)
+        self.assertEqual(self.index.nearest(0.4, 0.0)[0].ID, 1)
+
+    def test_query_outside_occupied_area(self):
+        rng = random.Random(3)
+        ports = [Port(ID=i, latitude=rng.random(), longitude=rng.random()) for i in range(1000)]
+        index = SpatialIndex(ports, cellSize=0.01)
+        origin = Port(ID=-1, latitude=60.0, longitude=60.0)
+        self.assertEqual(index.nearest(60.0, 60.0, k=3), sorted(ports, key=origin.getDistance)[:3])
+        self.assertEqual(len(index.within_radius(60.0, 60.0, 100.0)), 1000)
+        self.assertEqual(len(index.bounding_box(-50.0, -50.0, 50.0, 50.0)), 1000)
+        self.assertEqual(index.bounding_box(10.0, 10.0, 20.0, 20.0), [])
+
+class TestLoadPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.port = Port(ID=1, latitude=0, longitude=0)
+        self.cheap = ShipBuilder(ID=1, fuel=0, currentPort=self.port) \
+            .set_total_weight_capacity(300) \
+            .set_container_limits(3, 2, 1, 1) \
+            .set_fuel_consumption(1.0) \
+            .build()
+        self.costly = ShipBuilder(ID=2, fuel=0, currentPort=self.port) \
+            .set_total_weight_capacity(300) \
+            .set_container_limits(3, 2, 1, 1) \
+            .set_fuel_consumption(3.0) \
+            .build()
+        self.port.incomingShip(self.costly)
+        self.port.incomingShip(self.cheap)
+        self.containers = [
+            ContainerFactory.create_container("basic", ID=1, weight=200),
+            ContainerFactory.create_container("basic", ID=2, weight=150),
+            ContainerFactory.create_container("basic", ID=3, weight=150),
+            ContainerFactory.create_container("refrigerated", ID=4, weight=100),
+            ContainerFactory.create_container("refrigerated", ID=5, weight=100)
+        ]
+
+    def test_exact_mode_not_worse_than_greedy(self):
+        planner = LoadPlanner.for_port(self.port)
+        greedy = planner.greedy(self.containers)
+        exact = planner.branch_and_bound(self.containers, timeBudget=5.0)
+
+        self.assertTrue(exact.optimal)
+        self.assertEqual(exact.loadedWeight, 600)
+        self.assertLessEqual(greedy.loadedWeight, exact.loadedWeight)
+
+    def test_apply_loads_ships(self):
+        plan = LoadPlanner.for_port(self.port).branch_and_bound(self.containers, timeBudget=5.0)
+        loaded = plan.apply()
+        self.assertEqual(len(loaded), len(self.containers) - len(plan.unassigned))
+        self.assertEqual(self.cheap.totalWeight + self.costly.totalWeight, plan.loadedWeight)
+
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.origin = Port(ID=1, latitude=0, longitude=0)
+        self.destination = Port(ID=2, latitude=0, longitude=10)
+        self.ships = []
+        for i in range(2):
+            ship = ShipBuilder(ID=i, fuel=100, currentPort=self.origin) \
+                .set_total_weight_capacity(100) \
+                .set_container_limits(5, 5, 5, 5) \
+                .set_fuel_consumption(1.0) \
+                .build()
+            self.origin.incomingShip(ship)
+            self.ships.append(ship)
+        self.simulation = Simulation([self.origin, self.destination], self.ships, speed=2.0, berths={2: 1})
+
+    def test_voyage_takes_time_and_berths_are_limited(self):
+        first, second = self.ships
+        self.simulation.schedule_sail(0, first, self.destination)
+        self.simulation.schedule_sail(1, second, self.destination)
+
+        self.simulation.run(until=6.5)
+        self.assertIn(first, self.destination.current)
+        self.assertNotIn(second, self.destination.current)
+        self.assertIn(second, self.simulation.waiting[2])
+
+        self.simulation.schedule_sail(7, first, self.origin)
+        self.simulation.run()
+        self.assertIn(second, self.destination.current)
+        self.assertIs(first.currentPort, self.origin)
+        self.assertEqual(self.simulation.now, 12)
+
+    def test_operations_wait_for_arrival(self):
+        ship = self.ships[0]
+        self.simulation.schedule_sail(0, ship, self.destination)
+        self.simulation.schedule_refuel(1, ship, 50)
+        self.simulation.sample_every(2.0)
+        self.simulation.run(until=4)
+        self.assertEqual(ship.fuel, 90)
+
+        self.simulation.run()
+        self.assertEqual(ship.fuel, 140)
+        self.assertEqual(self.simulation.samples[-1], (6.0, {1: 1, 2: 1}))
+
+    def test_samplers_stop_with_the_other_events(self):
+        self.simulation.schedule_sail(0, self.ships[0], self.destination)
+        self.simulation.sample_every(1.0)
+        self.simulation.sample_every(2.0)
+        self.assertEqual(self.simulation.run(), 6.0)
+        self.assertEqual(self.simulation.queue, [])
+        self.assertEqual([time for time, _ in self.simulation.samples], [0, 0, 1, 2, 2, 3, 4, 4, 5, 6])
+
+class TestSweepRunner(unittest.TestCase):
+
+    def test_parameter_grid(self):
+        grid = parameter_grid({"fuel": [100, 200], "capacity": [500]})
+        self.assertEqual(grid, [{"fuel": 100, "capacity": 500}, {"fuel": 200, "capacity": 500}])
+
+    def test_deterministic_and_resumable(self):
+        self.assertEqual(run_scenario({"operations": 50}, 7), run_scenario({"operations": 50}, 7))
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "sweep.jsonl")
+            runner = SweepRunner({"fuel": [100, 400], "operations": [50]}, seed=1, checkpoint=checkpoint, workers=2)
+            results = runner.run()
+            self.assertEqual(len(results), 2)
+
+            with open(checkpoint) as file:
+                first = file.readline()
+            with open(checkpoint, "w") as file:
+                file.write(first + '{"key": ')
+            self.assertEqual(runner.run(), results)
+
+            with patch("sweep.os.replace", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    runner.run()
+            self.assertEqual(len(runner.completed()), 2)
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_round_trip(self):
+        origin = Port(1, 50.45, 30.52, historyLimit=5)
+        destination = Port(2, 52.37, 4.9)
+        ship = ShipBuilder(7, 500.5, origin).set_total_weight_capacity(1000) \
+            .set_container_limits(10, 5, 2, 3).set_fuel_consumption(0.1).build()
+        other = ShipBuilder(8, 300, destination).set_total_weight_capacity(800) \
+            .set_container_limits(4, 2, 1, 1).set_fuel_consumption(0.2).build()
+        origin.incomingShip(ship)
+        destination.incomingShip(other)
+        destination.outgoingShip(other)
+        ship.load(ContainerFactory.create_container("heavy", 11, 400))
+        ship.load(ContainerFactory.create_container("liquid", 12, 250.5))
+        destination.containers.append(BasicContainer(13, 200))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.snap")
+            write_snapshot(path, [origin, destination], [ship, other], sequence=42)
+            ports, ships, sequence = read_snapshot(path)
+
+        self.assertEqual(sequence, 42)
+        self.assertEqual([port.historyLimit for port in ports], [5, None])
+        self.assertEqual(ships[0].fuel, 500.5)
+        self.assertIsInstance(ships[1].fuel, int)
+        self.assertIs(ships[0].currentPort, ports[0])
+        self.assertEqual(list(ports[0].current), [ships[0]])
+        self.assertEqual(list(ports[1].history), [ships[1]])
+        describe = lambda containers: [(type(c), c.ID, c.weight) for c in containers]
+        self.assertEqual(describe(ships[0].containers), describe(ship.containers))
+        self.assertEqual(ships[0].totalWeight, 650.5)
+        self.assertEqual(describe(ports[1].containers), [(BasicContainer, 13, 200)])
+
+    def test_history_times_are_relative_and_ints_exact(self):
+        origin = Port(1, 0.0, 0.0, historyWindow=100.0, clock=lambda: 1000.0)
+        ship = ShipBuilder(2**60 + 1, 2**60 + 1, origin).set_total_weight_capacity(1000) \
+            .set_container_limits(10, 5, 2, 3).set_fuel_consumption(0.1).build()
+        origin.incomingShip(ship)
+        origin.outgoingShip(ship)
+        origin.incomingShip(ship)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.snap")
+            origin.clock = lambda: 1030.0
+            write_snapshot(path, [origin], [ship])
+            ports, ships, _ = read_snapshot(path, clock=lambda: 5.0)
+
+            self.assertEqual(list(ports[0].history.values()), [-25.0])
+            self.assertEqual((ships[0].ID, ships[0].fuel), (2**60 + 1, 2**60 + 1))
+
+            origin.longitude = 2**60 + 1
+            other = Port(2, 0.5, 0.0)
+            with self.assertRaises(ValueError):
+                write_snapshot(path, [origin, other], [ship])
+
+    def test_rejects_foreign_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.snap")
+            with open(path, "wb") as file:
+                file.write(bytes(64))
+            with self.assertRaises(ValueError):
+                read_snapshot(path)
+
+class TestOperationLog(unittest.TestCase):
+
+    def scenario(self):
+        rng = random.Random(3)
+        ports = make_ports(5, rng)
+        ships = make_ships(10, ports, rng)
+        return ports, ships, make_operations(300, ships, ports, rng)
+
+    def report(self, ports):
+        buffer = io.StringIO()
+        writer = ReportWriter(buffer)
+        for port in ports:
+            writer.write_port(port)
+        writer.close()
+        return buffer.getvalue()
+
+    def test_round_trip(self):
+        operations = self.scenario()[2]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "operations.log")
+            with OperationLog(path, syncEvery=50) as log:
+                log.append_many(operations)
+            self.assertEqual(list(read_log(path)), operations)
+            self.assertEqual(list(read_log(path, 250)), operations[250:])
+
+    def test_recovery_replays_tail(self):
+        ports, ships, operations = self.scenario()
+        expected_ports, expected_ships, _ = self.scenario()
+        OperationDispatcher(Fleet(expected_ships), PortRegistry(expected_ports)).run(operations)
+
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "operations.log")
+            snapshot_path = os.path.join(directory, "state.snap")
+            with OperationLog(log_path, syncEvery=10) as log:
+                JournaledDispatcher(ports, ships, log, snapshot_path, checkpointEvery=128).run(operations)
+            with open(log_path, "ab") as file:
+                file.write(b"\x01\x02\x03")
+
+            self.assertEqual(read_snapshot(snapshot_path)[2], 256)
+            recovered_ports, _, sequence = recover(snapshot_path, log_path)
+            self.assertEqual(sequence, 300)
+            self.assertEqual(self.report(recovered_ports), self.report(expected_ports))
+
+            with OperationLog(log_path) as log:
+                self.assertEqual(log.sequence, 300)
+                log.append(operations[0])
+            self.assertEqual(len(list(read_log(log_path))), 301)
+
+    def test_journal_rejects_bad_operations(self):
+        ports, ships, operations = self.scenario()
+        bad = [
+            {"action": "load", "shipID": ships[0].ID, "type": "crate", "containerID": 1, "weight": 5},
+            {"action": "dock", "shipID": ships[0].ID},
+            {"action": "sail", "shipID": ships[0].ID},
+            {"action": "unload", "shipID": ships[0].ID, "containerID": "x"},
+            {"action": "refuel", "shipID": 999, "amount": 1}
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "operations.log")
+            with OperationLog(log_path) as log:
+                journal = JournaledDispatcher(ports, ships, log, os.path.join(directory, "state.snap"))
+                results = [journal.dispatch(operation) for operation in bad + operations[:1]]
+            self.assertEqual(list(read_log(log_path)), operations[:1])
+        self.assertEqual(results[:5], [False] * 5)
+        self.assertEqual([rejection["index"] for rejection in journal.dispatcher.rejected][:5], [0, 1, 2, 3, 4])
+        self.assertEqual(journal.dispatcher.rejected[3]["reason"], "operation cannot be encoded in the log")
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_compare_with_baseline(self):
+        rows = compare({"small/sail": 130.0, "small/replay": 80.0, "small/report": 100.0, "small/new": 5.0},
+                       {"small/sail": 100.0, "small/replay": 100.0, "small/report": 105.0})
+        self.assertEqual([(name, status) for name, _, _, _, status in rows],
+                         [("small/sail", "regression"), ("small/replay", "improved"),
+                          ("small/report", "ok"), ("small/new", "new")])
+
+    def test_suite_runs(self):
+        results = run_suite(cases=("load_unload", "replay"), repeats=1)
+        self.assertEqual(sorted(results), ["small/load_unload", "small/replay"])
+        self.assertTrue(all(value > 0 for value in results.values()))
+
 if __name__ == '__main__':
     unittest.main()
 